@@ -0,0 +1,29 @@
+import pytest
+from core.testing import (
+    PAGE_SIZES, QueryRecorder, constant_message, query_counts,
+    repeated_message,
+)
+
+
+@pytest.fixture
+def query_recorder(db):
+    """Записывает запросы блока: ``with query_recorder() as queries``."""
+    return QueryRecorder
+
+
+@pytest.fixture
+def assert_no_repeated_queries(db):
+    def check(request, threshold=2, ignore=()):
+        with QueryRecorder() as recorder:
+            request()
+        repeated = recorder.repeated(threshold, ignore)
+        assert not repeated, repeated_message(repeated)
+    return check
+
+
+@pytest.fixture
+def assert_constant_queries(db):
+    def check(request, page_sizes=PAGE_SIZES, ignore=()):
+        counts = query_counts(request, page_sizes, ignore)
+        assert len(set(counts.values())) == 1, constant_message(counts)
+    return check
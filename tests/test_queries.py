@@ -0,0 +1,19 @@
+import pytest
+from django.core.cache import cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+class TestFeedQueries:
+
+    @pytest.mark.parametrize('url', ['/', '/group/test-link/', '/profile/AnotherUser/', '/follow/'])
+    def test_feed_pages_have_no_n_plus_one(
+            self, user_client, another_few_posts_with_group_with_follower,
+            assert_no_repeated_queries, assert_constant_queries, url):
+        def request():
+            cache.clear()
+            response = user_client.get(url)
+            assert response.status_code == 200
+
+        assert_no_repeated_queries(request)
+        assert_constant_queries(request)
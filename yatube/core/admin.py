@@ -0,0 +1,31 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+def retry(modeladmin, request, queryset):
+    queryset.exclude(status=Task.RUNNING).update(
+        status=Task.QUEUED, run_at=timezone.now(), attempts=0
+    )
+
+
+retry.short_description = 'Перезапустить'
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'created',
+        'run_at',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    readonly_fields = ('created', 'started', 'finished')
+    actions = (retry,)
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,53 @@
+"""Поколения кэша.
+
+Ключи кэшированных страниц содержат текущее поколение. Смена поколения
+мгновенно делает все старые ключи недостижимыми, поэтому TTL можно
+держать большим, а устаревшие записи вытесняются сами. Это верно, только
+если поколения видят все процессы: с locmem (``SHARED_CACHE = False``)
+TTL страниц короткий.
+
+Поколение моложе ``REPLICA_PIN_SECONDS`` закрепляет чтения запроса за
+основной базой (``db_router.pin_primary``): иначе первый читатель после
+записи собрал бы страницу с отстающей реплики и положил её в кэш под
+новым поколением на весь TTL.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .db_router import pin_primary
+
+
+def generation_key(name):
+    return f'generation:{name}'
+
+
+def get_generations(names):
+    """Общий токен поколений ``names``: меняется при смене любого из них."""
+    keys = [generation_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        # Время создания в самом поколении: по нему видно, что запись
+        # могла ещё не доехать до реплик.
+        generation = f'{uuid.uuid4().hex}.{time.time():.0f}'
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.get(key, generation)
+        found[key] = generation
+    if settings.DATABASE_REPLICAS and any(
+        _age(found[key]) < settings.REPLICA_PIN_SECONDS for key in keys
+    ):
+        pin_primary()
+    return '-'.join(found[key] for key in keys)
+
+
+def _age(generation):
+    _, _, created = generation.partition('.')
+    return time.time() - int(created or 0)
+
+
+def bump_generation(*names):
+    """Инвалидирует всё, что закэшировано под поколениями ``names``."""
+    cache.delete_many([generation_key(name) for name in names])
@@ -0,0 +1,233 @@
+"""Общий для процессов одного хоста кэш в файле SQLite.
+
+``LocMemCache`` у каждого процесса свой: страницы собираются в каждом
+воркере заново, а ``bump_generation`` сбрасывает поколение только в том
+процессе, где случилась запись. ``SQLiteCache`` хранит записи в одном
+файле (режим WAL), поэтому его видят все воркеры без внешнего сервиса.
+
+Размер ограничен ``MAX_ENTRIES`` записей и ``MAX_SIZE`` байт. При
+переполнении удаляются просроченные записи, затем давно не читанные
+(LRU). Время чтения обновляется не чаще раза в ``TOUCH_INTERVAL``
+секунд, чтобы попадание в кэш оставалось чтением, а не записью.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_stats VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_stats SET entries = entries + 1, size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_stats SET entries = entries - 1, size = size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache
+BEGIN
+    UPDATE cache_stats SET size = size - OLD.size + NEW.size;
+END;
+'''
+
+UPSERT = '''
+INSERT INTO cache (key, value, expires, accessed, size)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value, expires = excluded.expires,
+    accessed = excluded.accessed, size = excluded.size
+'''
+
+
+class SQLiteCache(BaseCache):
+    """Кэш Django в файле ``LOCATION``.
+
+    OPTIONS: ``MAX_ENTRIES`` и ``CULL_FREQUENCY`` как у встроенных
+    бэкендов, ``MAX_SIZE`` — предел суммарного размера значений в байтах,
+    ``TOUCH_INTERVAL`` — точность LRU в секундах.
+    """
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS') or {}
+        self._path = location
+        self._max_size = int(options.get('MAX_SIZE', 64 * 2**20))
+        self._touch_interval = float(options.get('TOUCH_INTERVAL', 10))
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        # Соединение своё у каждого потока и процесса (после fork).
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self._path, timeout=5,
+                                 isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode = wal')
+            db.execute('PRAGMA synchronous = normal')
+            db.executescript(SCHEMA)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return (key, data, self.get_backend_timeout(timeout), time.time(),
+                len(data))
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        names = {self._key(key, version): key for key in keys}
+        now = time.time()
+        placeholders = ', '.join('?' * len(names))
+        rows = self._db.execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({placeholders}) '
+            f'AND (expires IS NULL OR expires > ?)',
+            [*names, now]
+        ).fetchall()
+        stale = [
+            (now, key) for key, _, accessed in rows
+            if now - accessed >= self._touch_interval
+        ]
+        if stale:
+            self._db.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?', stale
+            )
+        return {names[key]: pickle.loads(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [
+            self._row(self._key(key, version), value, timeout)
+            for key, value in data.items()
+        ]
+        with self._transaction() as db:
+            db.executemany(UPSERT, rows)
+            self._cull(db, [row[0] for row in rows])
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self._row(self._key(key, version), value, timeout)
+        with self._transaction() as db:
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (row[0], time.time())
+            )
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache '
+                '(key, value, expires, accessed, size) '
+                'VALUES (?, ?, ?, ?, ?)', row
+            ).rowcount == 1
+            if added:
+                self._cull(db, [row[0]])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time())
+        ).rowcount == 1
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        names = [self._key(key, version) for key in keys]
+        if names:
+            placeholders = ', '.join('?' * len(names))
+            self._db.execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', names
+            )
+
+    def has_key(self, key, version=None):
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())
+        ).fetchone() is not None
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт всё время жизни потока, как у LocMemCache.
+        pass
+
+    def _transaction(self):
+        return _Immediate(self._db)
+
+    def _cull(self, db, written):
+        """Удаляет просроченные, затем давно не читанные записи, пока кэш
+        не уложится в MAX_ENTRIES и MAX_SIZE. ``written`` — ключи, только
+        что записанные в этой транзакции."""
+        entries, size = db.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        while True:
+            entries, size = db.execute(
+                'SELECT entries, size FROM cache_stats'
+            ).fetchone()
+            if entries <= self._max_entries and size <= self._max_size:
+                return
+            if self._cull_frequency == 0:
+                # Как у встроенных бэкендов: 0 — очистить кэш целиком.
+                # Они чистят до записи, поэтому новые ключи остаются.
+                placeholders = ', '.join('?' * len(written))
+                db.execute(
+                    f'DELETE FROM cache WHERE key NOT IN ({placeholders})',
+                    written
+                )
+                return
+            batch = max(1, entries // self._cull_frequency)
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)', (batch,)
+            )
+
+
+class _Immediate:
+    """BEGIN IMMEDIATE ... COMMIT: запись с проверкой без гонок."""
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        self.db.execute('BEGIN IMMEDIATE')
+        return self.db
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.db.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,70 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики перечислены в ``DATABASE_REPLICAS``; без них всё идёт в
+``default``. Чтения возвращаются в основную базу, пока запрос закреплён
+за ней: внутри транзакции, после записи в этом же запросе и в течение
+``REPLICA_PIN_SECONDS`` после записи того же пользователя (см.
+``ReplicaPinMiddleware``), чтобы он сразу видел свои изменения.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Приложения, которые всегда читаются из основной базы: сессия, не
+# доехавшая до реплики, разлогинила бы пользователя, а воркер не увидел
+# бы свежих задач очереди (core).
+PRIMARY_ONLY_APPS = {'sessions', 'core'}
+# Записи этих приложений не закрепляют пользователя за основной базой:
+# задачи очереди (core) ставятся и из GET-запросов лент, а читать их
+# пользователю не нужно.
+UNTRACKED_WRITE_APPS = {'core'}
+
+_state = threading.local()
+
+
+def pin_primary():
+    """Закрепляет чтения текущего потока за основной базой."""
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote():
+    """Была ли запись с последнего ``reset``."""
+    return getattr(_state, 'wrote', False)
+
+
+def reset():
+    _state.pinned = False
+    _state.wrote = False
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or is_pinned()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in UNTRACKED_WRITE_APPS:
+            _state.wrote = True
+            pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in pool and obj2._state.db in pool
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными из основной базы.
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,188 @@
+import hashlib
+import math
+import random
+import time
+from calendar import timegm
+from functools import wraps
+
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+from .cache import get_generations
+
+# Сколько живёт блокировка пересборки и сколько её ждут остальные запросы.
+REBUILD_LOCK_TIMEOUT = 10
+REBUILD_WAIT = 5
+REBUILD_POLL_INTERVAL = 0.05
+# Сколько устаревшая запись ещё хранится, чтобы отдавать её на время
+# пересборки.
+STALE_GRACE = 60
+# Коэффициент раннего пересчёта (XFetch): чем больше, тем раньше.
+EARLY_RECOMPUTE_BETA = 1.0
+
+
+def page_cache_key(request, key_prefix, generation=None):
+    user = request.user
+    viewer = user.pk if user.is_authenticated else 'anon'
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{key_prefix}:{generation}:{viewer}:{url}'
+
+
+def _is_fresh(expires, delta, beta):
+    """Решает, пора ли пересчитать запись заранее.
+
+    Вероятность пересчёта растёт по мере приближения к ``expires`` и
+    тем быстрее, чем дольше собиралась страница (``delta`` секунд).
+    """
+    return time.time() - delta * beta * math.log(random.random()) < expires
+
+
+def _generation_token(generation, request, *args, **kwargs):
+    names = (
+        generation(request, *args, **kwargs) if callable(generation)
+        else generation
+    )
+    if not names:
+        return None
+    if isinstance(names, str):
+        names = (names,)
+    return get_generations(names)
+
+
+def _wait_for(cache, key):
+    deadline = time.monotonic() + REBUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(REBUILD_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+    return None
+
+
+def _rebuild(cache, view, request, args, kwargs, key, timeout):
+    started = time.time()
+    response = view(request, *args, **kwargs)
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    ):
+        delta = time.time() - started
+        cache.set(
+            key,
+            (response, started + timeout, delta),
+            timeout + STALE_GRACE
+        )
+    return response
+
+
+def cache_view(timeout, key_prefix, generation=None, cache_alias='default',
+               condition=None, beta=EARLY_RECOMPUTE_BETA):
+    """Кэширует страницу с защитой от одновременных пересборок.
+
+    Замена ``cache_page`` для наших представлений:
+
+    * ключ содержит поколение ``generation`` (см. ``core.cache``), так что
+      ``bump_generation`` сбрасывает страницу сразу; ``generation`` может
+      быть именем, кортежем имён или функцией от запроса, которая их
+      возвращает (например, поколение ленты конкретного пользователя);
+    * незадолго до истечения TTL запись с некоторой вероятностью
+      пересчитывается заранее (XFetch);
+    * пересобирает запись только запрос, взявший короткую блокировку в
+      кэше, остальные получают устаревшую копию или ждут первую сборку.
+
+    ``condition(request)`` позволяет кэшировать только часть запросов,
+    например первые страницы ленты.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or (
+                condition is not None and not condition(request)
+            ):
+                return view(request, *args, **kwargs)
+
+            cache = caches[cache_alias]
+            key = page_cache_key(
+                request, key_prefix, _generation_token(generation, request)
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                response, expires, delta = entry
+                if _is_fresh(expires, delta, beta):
+                    metrics.cache_hit()
+                    return response
+
+            lock_key = f'{key}:lock'
+            locked = cache.add(lock_key, True, REBUILD_LOCK_TIMEOUT)
+            if not locked:
+                if entry is not None:
+                    metrics.cache_hit()
+                    return response
+                response = _wait_for(cache, key)
+                if response is not None:
+                    metrics.cache_hit()
+                    return response
+            metrics.cache_miss()
+            try:
+                return _rebuild(
+                    cache, view, request, args, kwargs, key, timeout
+                )
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+        return wrapper
+    return decorator
+
+
+def conditional_view(last_modified, generation=None,
+                     send_last_modified=True):
+    """Отвечает 304 Not Modified, не вызывая представление.
+
+    ``last_modified(request, *args, **kwargs)`` — время последнего
+    изменения данных (обычно одно обращение к индексу) или None. ETag
+    складывается из этого времени, поколений ``generation`` (как в
+    ``cache_view``; функция получает и аргументы представления) и
+    пользователя, поэтому правки, не меняющие дату, тоже его меняют.
+
+    Если время может уйти назад (у списка — после удаления самого нового
+    элемента), ``send_last_modified=False``: страница проверяется только
+    по ETag, иначе клиент с одним If-Modified-Since получил бы 304.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            # Поколения — первыми: свежее поколение переводит чтение
+            # времени изменения на основную базу.
+            token = _generation_token(generation, request, *args, **kwargs)
+            modified = last_modified(request, *args, **kwargs)
+            user = request.user
+            viewer = user.pk if user.is_authenticated else 'anon'
+            etag = quote_etag(hashlib.md5(
+                f'{token}:{viewer}:{modified and modified.isoformat()}'
+                .encode()
+            ).hexdigest())
+            timestamp = (
+                send_last_modified and modified
+                and timegm(modified.utctimetuple())
+            )
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response.setdefault('ETag', etag)
+                if timestamp:
+                    response.setdefault(
+                        'Last-Modified', http_date(timestamp)
+                    )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,45 @@
+"""Отправка писем через очередь фоновых задач.
+
+``QueuedEmailBackend`` не ходит в почтовый сервер внутри запроса: каждое
+письмо сериализуется в задачу ``send_email``, а воркер отправляет его
+настоящим бэкендом ``TASK_EMAIL_BACKEND`` с повторами при ошибках.
+"""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import task
+
+
+def serialize(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+@task(max_attempts=5)
+def send_email(message):
+    email = EmailMultiAlternatives(**message)
+    email.alternatives = [tuple(pair) for pair in email.alternatives]
+    get_connection(settings.TASK_EMAIL_BACKEND).send_messages([email])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.attachments:
+                # Вложения не сериализуются в JSON — отправляем сразу.
+                get_connection(settings.TASK_EMAIL_BACKEND).send_messages(
+                    [message]
+                )
+            else:
+                send_email.delay(serialize(message))
+        return len(email_messages)
@@ -0,0 +1,78 @@
+import json
+import os
+import random
+import tempfile
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from core.cache_backends import SQLiteCache
+from core.metrics import percentile
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает задержки LocMemCache и SQLiteCache: запись, '
+            'попадание, промах и get_many. Выводит JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keys', type=int, default=1000,
+            help='Сколько записей положить в кэш.'
+        )
+        parser.add_argument(
+            '--operations', type=int, default=5000,
+            help='Операций каждого вида.'
+        )
+        parser.add_argument(
+            '--size', type=int, default=20 * 1024,
+            help='Размер значения в байтах (страница ленты — ~20 КиБ).'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['keys'] < 1 or options['operations'] < 1:
+            raise CommandError('--keys и --operations больше нуля')
+        params = {'OPTIONS': {'MAX_ENTRIES': options['keys'] * 2}}
+        with tempfile.TemporaryDirectory() as directory:
+            backends = {
+                'locmem': LocMemCache('benchmark', params),
+                'sqlite': SQLiteCache(
+                    os.path.join(directory, 'cache.sqlite3'), params
+                ),
+            }
+            report = {
+                name: self.measure(backend, options)
+                for name, backend in backends.items()
+            }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def measure(self, backend, options):
+        rng = random.Random(options['seed'])
+        keys = [f'key:{number}' for number in range(options['keys'])]
+        value = {'content': os.urandom(options['size']), 'status': 200}
+        operations = {
+            'set': lambda: backend.set(rng.choice(keys), value),
+            'get_hit': lambda: backend.get(rng.choice(keys)),
+            'get_miss': lambda: backend.get('missing'),
+            'get_many_10': lambda: backend.get_many(rng.sample(keys, 10)),
+        }
+        backend.clear()
+        backend.set_many({key: value for key in keys})
+        return {
+            name: self.timings(operation, options['operations'])
+            for name, operation in operations.items()
+        }
+
+    def timings(self, operation, count):
+        timings = []
+        for _ in range(count):
+            started = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 4),
+            'p95_ms': round(percentile(timings, 0.95), 4),
+            'p99_ms': round(percentile(timings, 0.99), 4),
+        }
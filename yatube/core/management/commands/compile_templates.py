@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.templates import compile_templates
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны проекта и проверяет {% load %}, '
+            '{% extends %} и {% include %}. Запускается при деплое.')
+
+    def handle(self, *args, **options):
+        count, errors = compile_templates()
+        if errors:
+            raise CommandError('Ошибки в шаблонах:\n' + '\n'.join(
+                f'{name}: {error}' for name, error in errors.items()
+            ))
+        self.stdout.write(
+            self.style.SUCCESS(f'Шаблонов скомпилировано: {count}')
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import tasks
+
+
+class Command(BaseCommand):
+    help = ('Воркер очереди фоновых задач. Выполняет готовые задачи, а '
+            'когда их нет — ждёт --sleep секунд.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.'
+        )
+        parser.add_argument(
+            '--sleep', type=float,
+            help='Пауза при пустой очереди (по умолчанию '
+                 'TASK_POLL_INTERVAL).'
+        )
+        parser.add_argument(
+            '--limit', type=int,
+            help='Выйти после стольких задач.'
+        )
+
+    def handle(self, *args, **options):
+        sleep = options['sleep'] or settings.TASK_POLL_INTERVAL
+        limit = options['limit']
+        done = 0
+        checked = None
+        try:
+            while limit is None or done < limit:
+                close_old_connections()
+                # Обслуживание очереди — не чаще раза за паузу, чтобы при
+                # потоке задач не платить за него на каждой.
+                if checked is None or time.monotonic() - checked >= sleep:
+                    self.maintain()
+                    checked = time.monotonic()
+                if tasks.run_next() is not None:
+                    done += 1
+                    continue
+                if options['once']:
+                    break
+                time.sleep(sleep)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
+
+    def maintain(self):
+        requeued = tasks.requeue_stale()
+        if requeued:
+            self.stderr.write(f'Возвращено в очередь: {requeued}')
+        tasks.purge()
@@ -0,0 +1,13 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.tasks import queue_stats
+
+
+class Command(BaseCommand):
+    help = ('Глубина очереди фоновых задач по статусам, возраст самой '
+            'старой готовой задачи и задержки (p50/p95). Выводит JSON.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(queue_stats(), indent=2))
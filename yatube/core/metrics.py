@@ -0,0 +1,99 @@
+"""Метрики текущего запроса.
+
+``RequestMetricsMiddleware`` открывает сбор через ``collect``, а код,
+который тратит время запроса, добавляет в него свои числа: обёртка
+``execute_wrapper`` — запросы к БД, шаблонный бэкенд — рендер,
+``cache_view``, карточки постов и кэш комментариев — попадания в кэш и
+промахи. Вне сбора функции ничего не делают, поэтому несэмплированные
+запросы почти ничего не платят.
+"""
+import math
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        # Глубина вложенных рендеров: считается только внешний, иначе
+        # шаблон, отрендеренный внутри другого, попал бы в сумму дважды.
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def as_dict(self):
+        return {
+            'db_queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+
+def current():
+    """Метрики текущего запроса или None вне сбора."""
+    return getattr(_local, 'metrics', None)
+
+
+@contextmanager
+def collect():
+    metrics = RequestMetrics()
+    _local.metrics = metrics
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            yield metrics
+    finally:
+        _local.metrics = None
+
+
+@contextmanager
+def template_render():
+    """Замер рендера шаблона; вложенные рендеры входят во внешний."""
+    metrics = current()
+    if metrics is None:
+        yield
+        return
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_time += time.perf_counter() - started
+
+
+def cache_hit(count=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_hits += count
+
+
+def cache_miss(count=1):
+    metrics = current()
+    if metrics is not None:
+        metrics.cache_misses += count
+
+
+def percentile(ordered, share):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    rank = math.ceil(share * len(ordered))
+    return ordered[max(rank, 1) - 1]
@@ -0,0 +1,93 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+
+from . import db_router, metrics
+
+logger = logging.getLogger('core.metrics')
+
+
+def server_timing(total, collected=None):
+    """Значение заголовка Server-Timing."""
+    parts = []
+    if collected is not None:
+        parts += [
+            f'db;dur={collected.db_time * 1000:.2f};'
+            f'desc="{collected.queries} queries"',
+            f'tpl;dur={collected.template_time * 1000:.2f}',
+            f'cache;desc="hit={collected.cache_hits} '
+            f'miss={collected.cache_misses}"',
+        ]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """Время запроса, запросы к БД, рендер шаблонов и кэш страниц.
+
+    Подробные метрики собираются для доли запросов
+    ``REQUEST_METRICS_SAMPLE_RATE``: для них в Server-Timing попадают все
+    числа, а логгер ``core.metrics`` пишет строку JSON. Остальные
+    запросы получают только общее время.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            response = self.get_response(request)
+            response['Server-Timing'] = server_timing(
+                time.perf_counter() - started
+            )
+            return response
+
+        with metrics.collect() as collected:
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = server_timing(total, collected)
+
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            **collected.as_dict(),
+        }, ensure_ascii=False))
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Read-your-writes для ``PrimaryReplicaRouter``.
+
+    Небезопасные методы и запросы с cookie ``REPLICA_PIN_COOKIE`` читают из
+    основной базы. Ответ на запрос, который что-то записал, ставит эту
+    cookie на ``REPLICA_PIN_SECONDS`` — дольше отставания реплик.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db_router.reset()
+        if (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        ):
+            db_router.pin_primary()
+        try:
+            response = self.get_response(request)
+            wrote = db_router.wrote()
+        finally:
+            db_router.reset()
+        if wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,213 @@
+"""Фоновые задачи без брокера.
+
+Задача — обычная функция модуля, помеченная ``@task``. Вызов
+``func.delay(*args, **kwargs)`` записывает в таблицу ``core_task`` путь
+к функции и аргументы в JSON в той же транзакции, что и данные запроса:
+откат транзакции отменяет и задачу, а воркер не увидит её раньше данных.
+
+Воркер (``manage.py run_tasks``) берёт задачи, у которых наступил
+``run_at``, в порядке очереди. Захват — условный UPDATE по статусу,
+поэтому несколько воркеров не выполнят одну задачу дважды. Исключение
+планирует повтор с экспоненциальной задержкой, пока не кончатся попытки;
+задача, зависшая в ``running`` дольше ``TASK_TIMEOUT`` (воркер упал),
+возвращается в очередь.
+
+Каждое выполнение пишет строку JSON в логгер ``core.tasks``: ожидание в
+очереди и время работы. ``queue_stats`` — глубина очереди и задержки
+(``manage.py task_stats``).
+"""
+import json
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .metrics import percentile
+from .models import Task
+
+logger = logging.getLogger('core.tasks')
+
+# Сколько кандидатов просматривать за один захват: остальные могли
+# забрать другие воркеры.
+CLAIM_BATCH = 10
+# По скольким последним выполненным задачам считаются задержки.
+STATS_WINDOW = 1000
+
+
+def task(max_attempts=None, retry_delay=None):
+    """Делает функцию задачей очереди: добавляет ей ``delay``.
+
+    Аргументы задачи должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        func.delay = lambda *args, **kwargs: enqueue(func, *args, **kwargs)
+        return func
+    return decorator
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def _task(func, args, kwargs):
+    return Task(
+        name=task_name(func),
+        arguments=json.dumps({'args': args, 'kwargs': kwargs},
+                             ensure_ascii=False),
+        max_attempts=(getattr(func, 'max_attempts', None)
+                      or settings.TASK_MAX_ATTEMPTS),
+    )
+
+
+def enqueue(func, *args, **kwargs):
+    """Ставит вызов ``func(*args, **kwargs)`` в очередь."""
+    task = _task(func, args, kwargs)
+    task.save()
+    return task
+
+
+def enqueue_many(func, calls):
+    """Ставит в очередь вызовы ``func(*args)`` для каждого ``args`` из
+    ``calls`` одним INSERT."""
+    return Task.objects.bulk_create(
+        [_task(func, list(args), {}) for args in calls]
+    )
+
+
+def claim():
+    """Забирает самую старую готовую к запуску задачу или None."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+        .order_by('run_at', 'pk')
+        .values_list('pk', flat=True)[:CLAIM_BATCH]
+    )
+    for pk in candidates:
+        claimed = Task.objects.filter(pk=pk, status=Task.QUEUED).update(
+            status=Task.RUNNING, started=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def _retry_delay(func, attempts):
+    delay = getattr(func, 'retry_delay', None) or settings.TASK_RETRY_DELAY
+    return timedelta(seconds=delay * 2 ** (attempts - 1))
+
+
+def execute(task):
+    """Выполняет захваченную задачу и записывает итог."""
+    func = None
+    # Ожидание — от назначенного времени запуска до захвата.
+    wait = (task.started - task.run_at).total_seconds()
+    started = time.perf_counter()
+    try:
+        func = import_string(task.name)
+        arguments = json.loads(task.arguments)
+        func(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        task.last_error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            task.status = Task.QUEUED
+            task.run_at = timezone.now() + _retry_delay(func, task.attempts)
+        else:
+            task.status = Task.FAILED
+    else:
+        task.status = Task.DONE
+    run_time = time.perf_counter() - started
+    task.finished = timezone.now()
+    task.save(update_fields=[
+        'status', 'run_at', 'finished', 'last_error',
+    ])
+    log = logger.info if task.status == Task.DONE else logger.warning
+    log(json.dumps({
+        'task': task.name,
+        'id': task.pk,
+        'attempt': task.attempts,
+        'status': task.status,
+        'wait_ms': round(wait * 1000, 2),
+        'run_ms': round(run_time * 1000, 2),
+    }))
+    return task
+
+
+def run_next():
+    """Выполняет одну задачу; None, если выполнять нечего."""
+    task = claim()
+    return execute(task) if task is not None else None
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи, пока они есть. Возвращает их число."""
+    count = 0
+    while limit is None or count < limit:
+        if run_next() is None:
+            break
+        count += 1
+    return count
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров."""
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        started__lt=now - timedelta(seconds=settings.TASK_TIMEOUT),
+    )
+    error = 'Воркер не завершил задачу за TASK_TIMEOUT'
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Task.QUEUED, run_at=now, last_error=error
+    )
+    stale.update(status=Task.FAILED, finished=now, last_error=error)
+    return requeued
+
+
+def purge():
+    """Удаляет выполненные задачи старше ``TASK_RETENTION``."""
+    border = timezone.now() - timedelta(seconds=settings.TASK_RETENTION)
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE, finished__lt=border
+    ).delete()
+    return deleted
+
+
+def queue_stats():
+    """Глубина очереди и задержки последних выполненных задач."""
+    now = timezone.now()
+    counts = dict(
+        Task.objects.order_by().values_list('status')
+        .annotate(count=Count('pk'))
+    )
+    due = Task.objects.filter(status=Task.QUEUED, run_at__lte=now)
+    oldest = due.aggregate(oldest=Min('run_at'))['oldest']
+    recent = (
+        Task.objects.filter(status=Task.DONE)
+        .order_by('-finished')
+        .values_list('run_at', 'started', 'finished')[:STATS_WINDOW]
+    )
+    waits, runs = [], []
+    for run_at, started, finished in recent:
+        waits.append((started - run_at).total_seconds() * 1000)
+        runs.append((finished - started).total_seconds() * 1000)
+    stats = {
+        status: counts.get(status, 0) for status, _ in Task.STATUSES
+    }
+    stats['due'] = due.count()
+    stats['oldest_due_seconds'] = (
+        round((now - oldest).total_seconds(), 3) if oldest else 0
+    )
+    for name, values in (('wait_ms', sorted(waits)),
+                         ('run_ms', sorted(runs))):
+        for share in (0.5, 0.95):
+            stats[f'{name}_p{int(share * 100)}'] = (
+                round(percentile(values, share), 2) if values else None
+            )
+    return stats
@@ -0,0 +1,108 @@
+"""Проверки запросов к БД для тестов.
+
+``QueryRecorder`` записывает SQL, выполненный внутри блока, и находит
+запросы, отличающиеся только параметрами, — признак N+1. ``query_counts``
+прогоняет запрос при разных размерах страницы: у представления без N+1
+число запросов от размера страницы не зависит.
+
+Подключаются как ``QueryAssertionsMixin`` к ``TestCase`` или как фикстуры
+pytest из ``tests/fixtures/fixture_queries.py``.
+"""
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext, override_settings
+
+PAGE_SIZES = (1, 5, 10)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:\?, )*\?\)')
+
+
+def normalize(sql):
+    """SQL без значений параметров: строки и числа заменены на ``?``."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder(CaptureQueriesContext):
+    """Записывает запросы блока ``with``."""
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        super().__init__(connections[using])
+
+    @property
+    def statements(self):
+        return [query['sql'] for query in self.captured_queries]
+
+    def repeated(self, threshold=2, ignore=()):
+        """SELECT, выполненные ``threshold`` и более раз с точностью до
+        параметров: {шаблон: [запросы]}. Запросы, в которых находится
+        одно из регулярных выражений ``ignore``, не учитываются."""
+        groups = defaultdict(list)
+        for sql in self.statements:
+            if sql.startswith('SELECT') and not any(
+                re.search(pattern, sql) for pattern in ignore
+            ):
+                groups[normalize(sql)].append(sql)
+        return {
+            pattern: statements for pattern, statements in groups.items()
+            if len(statements) >= threshold
+        }
+
+
+def clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def query_counts(request, page_sizes=PAGE_SIZES, ignore=()):
+    """Число запросов ``request()`` при каждом POSTS_PER_PAGE из
+    ``page_sizes``; кэши очищаются, чтобы страница собиралась заново."""
+    counts = {}
+    for size in page_sizes:
+        with override_settings(POSTS_PER_PAGE=size):
+            clear_caches()
+            with QueryRecorder() as recorder:
+                request()
+        counts[size] = sum(
+            not any(re.search(pattern, sql) for pattern in ignore)
+            for sql in recorder.statements
+        )
+    return counts
+
+
+def repeated_message(repeated):
+    lines = ['Запросы, отличающиеся только параметрами (N+1):']
+    for pattern, statements in repeated.items():
+        lines.append(f'{len(statements)} × {pattern}')
+    return '\n'.join(lines)
+
+
+def constant_message(counts):
+    sizes = ', '.join(
+        f'{size} на странице — {count}' for size, count in counts.items()
+    )
+    return f'Число запросов растёт с размером страницы: {sizes}'
+
+
+class QueryAssertionsMixin:
+    """Проверки N+1 для ``TestCase``."""
+    def assertNoRepeatedQueries(self, request, threshold=2, ignore=()):
+        """``request()`` не повторяет запрос с разными параметрами."""
+        with QueryRecorder() as recorder:
+            request()
+        repeated = recorder.repeated(threshold, ignore)
+        if repeated:
+            self.fail(repeated_message(repeated))
+
+    def assertConstantQueries(self, request, page_sizes=PAGE_SIZES,
+                              ignore=()):
+        """Число запросов ``request()`` не зависит от размера страницы."""
+        counts = query_counts(request, page_sizes, ignore)
+        if len(set(counts.values())) > 1:
+            self.fail(constant_message(counts))
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """Кэш в файле SQLite: общий для экземпляров, с LRU и пределами."""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'),
+            {'OPTIONS': {'TOUCH_INTERVAL': 0, **options}}
+        )
+
+    def test_get_set_add_delete(self):
+        cache = self.make_cache()
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        self.assertEqual(
+            cache.get_many(['key', 'new', 'missing']),
+            {'key': {'value': 1}, 'new': 'value'}
+        )
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key', 'default'), 'default')
+
+    def test_expired_entries(self):
+        cache = self.make_cache()
+        cache.set('key', 'value', timeout=10)
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=time.time() + 11):
+            self.assertIsNone(cache.get('key'))
+            self.assertFalse(cache.has_key('key'))
+            self.assertTrue(cache.add('key', 'again'))
+        self.assertEqual(cache.get('key'), 'again')
+
+    def test_shared_between_instances(self):
+        """Второй экземпляр (как другой процесс) видит записи первого."""
+        writer, reader = self.make_cache(), self.make_cache()
+        writer.set('key', 'value')
+        self.assertEqual(reader.get('key'), 'value')
+        reader.delete('key')
+        self.assertIsNone(writer.get('key'))
+
+    def test_evicts_least_recently_read(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=3)
+        for number in range(3):
+            cache.set(f'key{number}', number)
+        cache.get('key0')
+
+        cache.set('key3', 3)
+
+        self.assertEqual(
+            cache.get_many([f'key{number}' for number in range(4)]),
+            {'key0': 0, 'key2': 2, 'key3': 3}
+        )
+
+    def test_cull_frequency_zero_clears_cache(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_FREQUENCY=0)
+        for number in range(3):
+            cache.set(f'key{number}', number)
+
+        cache.set_many({'key3': 3, 'key4': 4})
+
+        self.assertEqual(
+            cache.get_many([f'key{number}' for number in range(5)]),
+            {'key3': 3, 'key4': 4}
+        )
+
+    def test_max_size(self):
+        cache = self.make_cache(MAX_SIZE=3000, CULL_FREQUENCY=3)
+        for number in range(5):
+            cache.set(f'key{number}', b'x' * 1000)
+
+        stored = cache.get_many([f'key{number}' for number in range(5)])
+
+        self.assertLess(len(stored), 3)
+        self.assertIn('key4', stored)
+
+
+class BenchmarkCacheCommandTests(SimpleTestCase):
+    def test_reports_both_backends(self):
+        out = StringIO()
+        call_command('benchmark_cache', '--keys', '10',
+                     '--operations', '20', '--size', '100', stdout=out)
+        self.assertIn('"locmem"', out.getvalue())
+        self.assertIn('"get_hit"', out.getvalue())
@@ -0,0 +1,147 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings,
+)
+
+from core import db_router
+from core.cache import bump_generation, get_generations
+from core.management.commands import sync_replica
+from core.middleware import ReplicaPinMiddleware
+from core.models import Task
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    """Чтения идут на реплику, пока пользователь ничего не записал."""
+    def setUp(self):
+        db_router.reset()
+        self.addCleanup(db_router.reset)
+        self.router = db_router.PrimaryReplicaRouter()
+        self.reads = []
+
+    def view(self, write=False):
+        def view(request):
+            self.reads.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+                self.reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+        return ReplicaPinMiddleware(view)
+
+    def test_reads_replica_writes_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_sessions_and_tasks_read_primary(self):
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_is_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_pins_request_and_sets_cookie(self):
+        response = self.view(write=True)(RequestFactory().get('/'))
+
+        self.assertEqual(self.reads, ['replica', 'default'])
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        # Закрепление не переживает запрос
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_task_write_does_not_pin(self):
+        """Задачи, поставленные из GET ленты, не закрепляют читателя."""
+        def view(request):
+            self.router.db_for_write(Task)
+            self.reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(view)(RequestFactory().get('/'))
+
+        self.assertEqual(self.reads, ['replica'])
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_pinned_user_reads_primary(self):
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = '1'
+        response = self.view()(request)
+
+        self.assertEqual(self.reads, ['default'])
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_unsafe_method_reads_primary(self):
+        self.view()(RequestFactory().post('/'))
+        self.assertEqual(self.reads, ['default'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_fresh_generation_pins_primary(self):
+        """Страница, собранная сразу после записи, читается из основной
+        базы: иначе в кэш попала бы версия отстающей реплики."""
+        cache.clear()
+        bump_generation('page')
+        get_generations(['page'])
+        self.assertTrue(db_router.is_pinned())
+
+        db_router.reset()
+        later = time.time() + settings.REPLICA_PIN_SECONDS + 1
+        with mock.patch('core.cache.time.time', return_value=later):
+            get_generations(['page'])
+        self.assertFalse(db_router.is_pinned())
+
+
+class SyncReplicaCommandTests(TransactionTestCase):
+    """sync_replica копирует основную базу SQLite в файл реплики.
+
+    Backup API ждёт конца открытой транзакции, поэтому данные теста
+    фиксируются: TransactionTestCase.
+    """
+    def test_copies_primary(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Команда работает только с SQLite')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'replica.sqlite3')
+        post = Post.objects.create(
+            text='Пост', author=User.objects.create_user(username='author')
+        )
+        replicas = {
+            DEFAULT_DB_ALIAS: connection,
+            'replica': SimpleNamespace(settings_dict={'NAME': path}),
+        }
+
+        with override_settings(DATABASE_REPLICAS=['replica']), \
+                mock.patch.object(sync_replica, 'connections', replicas):
+            call_command('sync_replica', stdout=StringIO())
+
+        replica = sqlite3.connect(path)
+        self.addCleanup(replica.close)
+        self.assertEqual(
+            replica.execute('SELECT id, text FROM posts_post').fetchall(),
+            [(post.pk, 'Пост')]
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_requires_replicas(self):
+        with self.assertRaisesMessage(CommandError, 'YATUBE_REPLICA'):
+            call_command('sync_replica', stdout=StringIO())
@@ -0,0 +1,81 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.cache import bump_generation
+from core.decorators import cache_view
+
+BURST = 10
+
+
+class CacheViewTests(SimpleTestCase):
+    """Проверка защиты кэша страниц от одновременных пересборок."""
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+        @cache_view(60, key_prefix='test_page', generation='test_page')
+        def view(request):
+            with self.calls_lock:
+                self.calls += 1
+                number = self.calls
+            time.sleep(0.2)
+            return HttpResponse(f'render {number}')
+
+        self.view = view
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return request
+
+    def burst(self):
+        """Одновременно отправляет BURST запросов и возвращает ответы."""
+        barrier = threading.Barrier(BURST)
+        responses = []
+
+        def worker():
+            barrier.wait()
+            responses.append(self.view(self.request()).content)
+
+        threads = [threading.Thread(target=worker) for _ in range(BURST)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def test_cold_burst_renders_once(self):
+        """Пачка запросов к пустому кэшу собирает страницу один раз."""
+        responses = self.burst()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(responses, [b'render 1'] * BURST)
+
+    def test_stale_page_is_served_during_refresh(self):
+        """Пока одна пересборка идёт, остальные получают старую копию."""
+        self.view(self.request())
+
+        with mock.patch('core.decorators.time.time',
+                        return_value=time.time() + 61):
+            responses = self.burst()
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(responses.count(b'render 1'), BURST - 1)
+        self.assertEqual(responses.count(b'render 2'), 1)
+
+    def test_bump_generation_invalidates_page(self):
+        """Смена поколения сразу сбрасывает страницу."""
+        self.view(self.request())
+        self.view(self.request())
+        self.assertEqual(self.calls, 1)
+
+        bump_generation('test_page')
+
+        self.assertEqual(self.view(self.request()).content, b'render 2')
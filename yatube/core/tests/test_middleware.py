@@ -0,0 +1,102 @@
+import json
+import logging
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post, User
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+class RequestMetricsMiddlewareTests(TestCase):
+    """Метрики запроса попадают в Server-Timing и лог."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        Post.objects.create(
+            text='Тестовый текст',
+            author=User.objects.create_user(username='author'),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_index(self):
+        with self.assertLogs('core.metrics', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        return response, json.loads(logs.records[0].getMessage())
+
+    def test_sampled_request_reports_everything(self):
+        response, line = self.get_index()
+
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            self.assertIn(metric, timing)
+        self.assertEqual(line['view'], 'posts:index')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['db_queries'], 0)
+        self.assertIn(f'desc="{line["db_queries"]} queries"', timing)
+        self.assertGreater(line['template_ms'], 0)
+        # Страница и карточка её единственного поста.
+        self.assertEqual((line['cache_hits'], line['cache_misses']), (0, 2))
+
+    def test_cached_page_is_a_hit(self):
+        self.get_index()
+        response, line = self.get_index()
+
+        self.assertEqual((line['cache_hits'], line['cache_misses']), (1, 0))
+        self.assertEqual(line['template_ms'], 0)
+
+    @override_settings(COMMENTS_CACHE_THRESHOLD=0)
+    def test_card_and_comment_caches_are_counted(self):
+        """Карточки профиля и комментарии поста — без кэша страниц."""
+        post = Post.objects.get()
+        for url in (reverse('posts:profile', args=[post.author.username]),
+                    reverse('posts:post_detail', args=[post.pk])):
+            with self.subTest(url=url):
+                lines = []
+                for _ in range(2):
+                    with self.assertLogs('core.metrics', 'INFO') as logs:
+                        self.client.get(url)
+                    lines.append(json.loads(logs.records[0].getMessage()))
+                self.assertEqual(
+                    [(line['cache_hits'], line['cache_misses'])
+                     for line in lines],
+                    [(0, 1), (1, 0)]
+                )
+
+    def test_line_reaches_configured_handler(self):
+        """LOGGING выводит строки INFO, а не только WARNING и выше."""
+        logger = logging.getLogger('core.metrics')
+        # В тестах логгер поднят до WARNING (см. settings.TESTING).
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.INFO)
+        handler = logger.handlers[0]
+        with mock.patch.object(handler, 'stream', StringIO()) as stream:
+            self.client.get(reverse('posts:index'))
+        line = json.loads(stream.getvalue())
+        self.assertEqual(line['view'], 'posts:index')
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_reports_total_only(self):
+        with mock.patch('core.middleware.logger') as logger:
+            response = self.client.get(reverse('posts:index'))
+
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+$')
+        logger.info.assert_not_called()
+
+
+class TemplateTimeTests(SimpleTestCase):
+    def test_nested_render_is_counted_once(self):
+        """Карточка, отрендеренная внутри страницы, — часть её времени."""
+        with mock.patch('core.metrics.time.perf_counter',
+                        side_effect=[0, 1, 10]), \
+                metrics.collect() as collected:
+            with metrics.template_render():
+                with metrics.template_render():
+                    pass
+        self.assertEqual(collected.template_time, 10)
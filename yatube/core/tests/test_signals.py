@@ -0,0 +1,31 @@
+import os
+import tempfile
+from unittest import skipUnless
+
+from django.db import connection, connections
+from django.test import SimpleTestCase
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMA есть только в SQLite')
+class SqlitePragmasTests(SimpleTestCase):
+    """Новое соединение SQLite получает SQLITE_PRAGMAS."""
+    def test_file_database_is_tuned(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {
+                **connection.settings_dict,
+                'NAME': os.path.join(directory, 'db.sqlite3'),
+            }
+            database = type(connections['default'])(
+                settings_dict, alias='pragmas'
+            )
+            try:
+                with database.cursor() as cursor:
+                    values = [
+                        cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                        for name in ('journal_mode', 'synchronous',
+                                     'busy_timeout')
+                    ]
+            finally:
+                database.close()
+        # synchronous=NORMAL хранится как 1
+        self.assertEqual(values, ['wal', 1, 5000])
@@ -0,0 +1,147 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task()
+def record(*args, **kwargs):
+    calls.append((list(args), kwargs))
+
+
+@tasks.task(max_attempts=2, retry_delay=10)
+def fail():
+    raise ValueError('сломалось')
+
+
+class TaskQueueTests(TestCase):
+    """Очередь задач в БД: постановка, выполнение, повторы."""
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_and_run(self):
+        task = record.delay(1, 'два', key={'a': 1})
+
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertEqual(task.name, 'core.tests.test_tasks.record')
+        self.assertEqual(calls, [])
+        with self.assertLogs('core.tasks', 'INFO') as logs:
+            self.assertEqual(tasks.run_pending(), 1)
+
+        self.assertEqual(calls, [([1, 'два'], {'key': {'a': 1}})])
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual(task.attempts, 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['status'], Task.DONE)
+        self.assertIn('wait_ms', line)
+        self.assertIsNone(tasks.run_next())
+
+    def test_rollback_discards_task(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            record.delay()
+            raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_retry_with_backoff_then_fail(self):
+        task = fail.delay()
+        self.assertEqual(task.max_attempts, 2)
+
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.QUEUED)
+        self.assertIn('сломалось', task.last_error)
+        self.assertGreater(task.run_at,
+                           timezone.now() + timedelta(seconds=9))
+        # Повтор ещё не наступил
+        self.assertEqual(tasks.run_pending(), 0)
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.tasks', 'WARNING'):
+            tasks.run_next()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    @override_settings(TASK_TIMEOUT=60)
+    def test_stale_tasks_are_requeued(self):
+        started = timezone.now() - timedelta(minutes=5)
+        retried = Task.objects.create(name='x', status=Task.RUNNING,
+                                      attempts=1, max_attempts=3,
+                                      started=started)
+        exhausted = Task.objects.create(name='x', status=Task.RUNNING,
+                                        attempts=3, max_attempts=3,
+                                        started=started)
+        fresh = Task.objects.create(name='x', status=Task.RUNNING,
+                                    attempts=1, max_attempts=3,
+                                    started=timezone.now())
+
+        self.assertEqual(tasks.requeue_stale(), 1)
+
+        statuses = {
+            task.pk: task.status
+            for task in Task.objects.all()
+        }
+        self.assertEqual(statuses, {
+            retried.pk: Task.QUEUED,
+            exhausted.pk: Task.FAILED,
+            fresh.pk: Task.RUNNING,
+        })
+
+    def test_queue_stats(self):
+        record.delay()
+        tasks.run_pending()
+        record.delay()
+        record.delay()
+        Task.objects.filter(status=Task.QUEUED).update(
+            run_at=timezone.now() - timedelta(seconds=30)
+        )
+        Task.objects.create(name='x', run_at=timezone.now()
+                            + timedelta(hours=1))
+
+        stats = tasks.queue_stats()
+
+        self.assertEqual(stats['queued'], 3)
+        self.assertEqual(stats['due'], 2)
+        self.assertEqual(stats['done'], 1)
+        self.assertGreaterEqual(stats['oldest_due_seconds'], 30)
+        self.assertIsNotNone(stats['wait_ms_p95'])
+
+    def test_commands(self):
+        record.delay()
+        out = StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('Выполнено задач: 1', out.getvalue())
+
+        out = StringIO()
+        call_command('task_stats', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['done'], 1)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        TASK_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_email_is_sent_by_worker(self):
+        mail.send_mail('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'],
+                       html_message='<p>Текст</p>')
+
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(Task.objects.get().name, 'core.mail.send_email')
+        tasks.run_pending()
+
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Тема')
+        self.assertEqual(message.to, ['to@yatube.ru'])
+        self.assertEqual(message.alternatives,
+                         [('<p>Текст</p>', 'text/html')])
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.template import Engine
+from django.test import SimpleTestCase, override_settings
+
+from core.templates import compile_templates
+
+
+class CompileTemplatesTests(SimpleTestCase):
+    """Команда compile_templates проверяет шаблоны до выкладки."""
+    def test_project_templates_compile(self):
+        out = StringIO()
+        call_command('compile_templates', stdout=out)
+        self.assertIn('Шаблонов скомпилировано', out.getvalue())
+
+    def test_errors_are_reported(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        broken = {
+            'ok.html': '{% extends "base.html" %}',
+            'load.html': '{% load missing_library %}',
+            'include.html': '{% include "missing.html" %}',
+        }
+        for name, content in broken.items():
+            with open(os.path.join(directory, name), 'w') as file:
+                file.write(content)
+        templates = [{
+            **settings.TEMPLATES[0],
+            'DIRS': [directory, settings.TEMPLATES_DIR],
+        }]
+
+        with override_settings(TEMPLATES=templates):
+            _, errors = compile_templates()
+            with self.assertRaisesMessage(CommandError, 'missing.html'):
+                call_command('compile_templates', stdout=StringIO())
+
+        self.assertEqual(set(errors), {'load.html', 'include.html'})
+        self.assertIn('missing_library', errors['load.html'])
+
+    def test_cached_loader_is_warmed(self):
+        loaders = [('django.template.loaders.cached.Loader',
+                    settings.TEMPLATE_LOADERS)]
+        templates = [{
+            **settings.TEMPLATES[0],
+            'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'],
+                        'loaders': loaders},
+        }]
+        with override_settings(TEMPLATES=templates):
+            count, _ = compile_templates()
+            cache = Engine.get_default().template_loaders[0]
+            self.assertGreaterEqual(len(cache.get_template_cache), count)
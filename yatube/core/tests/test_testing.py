@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.test import TestCase
+
+from core.testing import QueryAssertionsMixin, normalize
+from posts.models import Post, User
+
+
+class QueryAssertionsTests(QueryAssertionsMixin, TestCase):
+    """Детектор N+1 ловит догрузку автора по одному посту."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for i in range(10):
+            Post.objects.create(
+                text='Текст',
+                author=User.objects.create_user(username=f'author{i}')
+            )
+
+    @staticmethod
+    def authors(queryset):
+        def request():
+            posts = queryset[:settings.POSTS_PER_PAGE]
+            return [post.author.username for post in posts]
+        return request
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize('SELECT "t1"."id" FROM "t1" WHERE ("t1"."a" = 15 '
+                      'AND "t1"."b" IN (1, 2, 3) AND "t1"."c" = \'x\'\'y\')'),
+            'SELECT "t1"."id" FROM "t1" WHERE ("t1"."a" = ? '
+            'AND "t1"."b" IN (...) AND "t1"."c" = ?)'
+        )
+
+    def test_n_plus_one_fails(self):
+        request = self.authors(Post.objects.all())
+        with self.assertRaisesRegex(AssertionError, 'N\\+1'):
+            self.assertNoRepeatedQueries(request)
+        with self.assertRaisesRegex(AssertionError, 'растёт'):
+            self.assertConstantQueries(request)
+
+    def test_select_related_passes(self):
+        request = self.authors(Post.objects.select_related('author'))
+        self.assertNoRepeatedQueries(request)
+        self.assertConstantQueries(request)
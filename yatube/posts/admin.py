@@ -1,8 +1,30 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from . import exchange
 from .models import Comment, Follow, Group, Post
 
 
+def export_action(kind, format):
+    """Действие админки: выбранные строки потоком в файл .gz."""
+    def action(modeladmin, request, queryset):
+        response = StreamingHttpResponse(
+            exchange.export(kind, format, compress=True, queryset=queryset),
+            content_type='application/gzip',
+        )
+        name = exchange.filename(kind, format, compress=True)
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+        return response
+
+    action.__name__ = f'export_{format}'
+    action.short_description = f'Выгрузить в {format.upper()} (gzip)'
+    return action
+
+
+def export_actions(kind):
+    return [export_action(kind, format) for format in exchange.FORMATS]
+
+
 class PostAdmin(admin.ModelAdmin):
     list_display = (
         'pk',
@@ -15,6 +37,7 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = export_actions('posts')
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -41,6 +64,7 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('author', 'text',)
     list_filter = ('created',)
     empty_value_display = '-пусто-'
+    actions = export_actions('comments')
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -49,6 +73,7 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author',
     )
+    actions = export_actions('follows')
 
 
 admin.site.register(Group, GroupAdmin)
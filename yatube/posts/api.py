@@ -0,0 +1,129 @@
+"""JSON API для лент и страницы поста.
+
+Те же запросы, что и у HTML-страниц (``for_feed``, курсорная пагинация,
+``comment_page``). Перед сборкой ответа ``conditional_view`` сверяет
+ETag клиента (у поста — и Last-Modified, см. ``posts.conditional``):
+опрос ленты без новых постов стоит одного запроса и возвращает 304 без
+сериализации страницы.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from core.decorators import conditional_view
+from .comments import comment_page
+from .conditional import (
+    group_modified, index_modified, latest_update, post_generations,
+    post_modified, profile_modified,
+)
+from .feed import feed_generations, follow_feed
+from .models import Group, Post, User
+from .paginators import CursorPaginator
+from .signals import INDEX_GENERATION
+
+
+def api_login_required(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse(
+                {'detail': 'Требуется авторизация'}, status=403
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def serialize_post(post):
+    author = post.author
+    return {
+        'id': post.pk,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': {
+            'username': author.username,
+            'full_name': author.get_full_name(),
+        },
+        'group': post.group and {
+            'slug': post.group.slug,
+            'title': post.group.title,
+        },
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+        'author': comment.author.username,
+    }
+
+
+def cursor_link(request, cursor, name='cursor'):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[name] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def feed_response(request, posts):
+    page = CursorPaginator(posts, settings.POSTS_PER_PAGE).get_page(
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'results': [serialize_post(post) for post in page],
+        'next': cursor_link(request, page.next_cursor),
+        'previous': cursor_link(request, page.previous_cursor),
+    })
+
+
+@conditional_view(index_modified, generation=INDEX_GENERATION,
+                  send_last_modified=False)
+def index(request):
+    return feed_response(request, Post.objects.for_feed())
+
+
+@conditional_view(group_modified, generation=INDEX_GENERATION,
+                  send_last_modified=False)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.for_feed())
+
+
+@conditional_view(profile_modified, generation=INDEX_GENERATION,
+                  send_last_modified=False)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, author.posts.for_feed())
+
+
+@conditional_view(post_modified, generation=post_generations)
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = comment_page(post, request.GET.get('comments'))
+    return JsonResponse({
+        **serialize_post(post),
+        'comments_count': post.comments_count,
+        'comments': {
+            'results': [serialize_comment(comment) for comment in comments],
+            'next': cursor_link(request, comments.next_cursor, 'comments'),
+        },
+    })
+
+
+@api_login_required
+@conditional_view(
+    lambda request: latest_update(follow_feed(request.user)),
+    generation=feed_generations,
+    send_last_modified=False,
+)
+def follow_index(request):
+    return feed_response(request, follow_feed(request.user).for_feed())
@@ -0,0 +1,275 @@
+"""Нагрузочный замер представлений posts.
+
+``seed`` наполняет базу данными через mixer и Faker, ``run`` прогоняет
+каждое представление тестовым клиентом и считает перцентили времени
+ответа, число запросов к БД и выделенную память. ``concurrency``
+одновременно читает ленты и пишет посты из нескольких потоков. Результат —
+словарь, который команды ``benchmark`` и ``benchmark_concurrency``
+сохраняют в JSON для сравнения коммитов.
+"""
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from mixer.backend.django import Mixer
+
+from core.metrics import percentile
+from .counters import rebuild_counters
+from .feed import rebuild_feed
+from .models import Comment, Follow, Group, Post, User
+
+READER = 'benchmark_reader'
+PASSWORD = 'benchmark'
+# Сколько запросов из прогона профилируются по памяти и числу запросов:
+# tracemalloc замедляет код, поэтому время меряется отдельно.
+PROFILED_REQUESTS = 5
+
+
+def seed(users=200, groups=20, posts=5000, comments=5000, follows=10,
+         random_seed=0):
+    """Наполняет базу; возвращает размеры набора данных."""
+    rng = random.Random(random_seed)
+    mixer = Mixer(commit=True)
+    mixer.faker.seed_instance(random_seed)
+
+    with transaction.atomic():
+        authors = mixer.cycle(users).blend(
+            User,
+            username=(f'user{i}' for i in range(users)),
+            first_name=mixer.FAKE,
+            last_name=mixer.FAKE,
+        )
+        group_list = mixer.cycle(groups).blend(
+            Group, slug=(f'group-{i}' for i in range(groups))
+        )
+        # Без картинок: mixer записал бы файлы в MEDIA_ROOT.
+        post_list = mixer.cycle(posts).blend(
+            Post,
+            image='',
+            author=(rng.choice(authors) for _ in range(posts)),
+            group=(rng.choice(group_list + [None]) for _ in range(posts)),
+        )
+        mixer.cycle(comments).blend(
+            Comment,
+            author=(rng.choice(authors) for _ in range(comments)),
+            post=(rng.choice(post_list) for _ in range(comments)),
+        )
+        # bulk_create обходит сигналы, поэтому ленты и счётчики
+        # пересобираются после вставки.
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author)
+            for user in authors
+            for author in rng.sample(authors, min(follows, users))
+            if user != author
+        )
+        for user in authors:
+            rebuild_feed(user.pk)
+        rebuild_counters()
+
+        reader = User.objects.create_user(READER, password=PASSWORD)
+        for author in rng.sample(authors, min(follows, users)):
+            Follow.objects.create(user=reader, author=author)
+    return {
+        'users': users, 'groups': groups, 'posts': posts,
+        'comments': comments, 'follows': follows, 'seed': random_seed,
+    }
+
+
+def scenarios(rng):
+    """Имя представления -> функция, готовящая (метод, url, data)."""
+    reader = User.objects.get(username=READER)
+    group_slugs = list(Group.objects.values_list('slug', flat=True))
+    usernames = list(
+        User.objects.exclude(pk=reader.pk)
+        .values_list('username', flat=True)
+    )
+    post_ids = list(Post.objects.values_list('pk', flat=True))
+
+    def follow():
+        # Подписка должна быть новой, иначе замеряется пустой get_or_create
+        username = rng.choice(usernames)
+        Follow.objects.filter(user=reader, author__username=username).delete()
+        return 'get', reverse('posts:profile_follow', args=[username]), None
+
+    return reader, {
+        'index': lambda: ('get', reverse('posts:index'), None),
+        'group_posts': lambda: (
+            'get', reverse('posts:group_list', args=[rng.choice(group_slugs)]),
+            None
+        ),
+        'profile': lambda: (
+            'get', reverse('posts:profile', args=[rng.choice(usernames)]),
+            None
+        ),
+        'post_detail': lambda: (
+            'get', reverse('posts:post_detail', args=[rng.choice(post_ids)]),
+            None
+        ),
+        'follow_index': lambda: ('get', reverse('posts:follow_index'), None),
+        'add_comment': lambda: (
+            'post', reverse('posts:add_comment', args=[rng.choice(post_ids)]),
+            {'text': 'Комментарий из бенчмарка'}
+        ),
+        'profile_follow': follow,
+    }
+
+
+def latency(timings, seconds, errors):
+    timings = sorted(timings)
+    if not timings:
+        return {'operations': 0, 'errors': errors}
+    return {
+        'operations': len(timings),
+        'errors': errors,
+        'per_second': round(len(timings) / seconds, 1),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+    }
+
+
+def concurrency(readers=4, writers=2, duration=5.0, random_seed=0):
+    """Читатели листают ленты, писатели публикуют посты — одновременно.
+
+    Каждый поток работает через своё соединение. Ошибки «database is
+    locked» и подобные считаются, а не прерывают прогон.
+    """
+    authors = list(User.objects.values_list('pk', flat=True))
+    stop = threading.Event()
+    lock = threading.Lock()
+    timings = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+
+    def read(rng):
+        list(Post.objects.for_feed()[:settings.POSTS_PER_PAGE])
+        list(
+            Post.objects.filter(author_id=rng.choice(authors))
+            .for_feed()[:settings.POSTS_PER_PAGE]
+        )
+
+    def write(rng):
+        with transaction.atomic():
+            Post.objects.create(
+                text='Пост из бенчмарка', author_id=rng.choice(authors)
+            )
+
+    def worker(kind, operation, number):
+        rng = random.Random(f'{random_seed}-{kind}-{number}')
+        try:
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    operation(rng)
+                except OperationalError:
+                    with lock:
+                        errors[kind] += 1
+                    continue
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings[kind].append(elapsed)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=('read', read, number))
+        for number in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=('write', write, number))
+        for number in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {
+        kind: latency(timings[kind], duration, errors[kind])
+        for kind in ('read', 'write')
+    }
+
+
+def clear_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def measure(client, prepare, requests, warm):
+    timings = []
+    statuses = set()
+    for _ in range(requests):
+        method, url, data = prepare()
+        if not warm:
+            clear_caches()
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data)
+        timings.append((time.perf_counter() - started) * 1000)
+        statuses.add(response.status_code)
+
+    queries, allocated = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(min(PROFILED_REQUESTS, requests)):
+            method, url, data = prepare()
+            if not warm:
+                clear_caches()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with CaptureQueriesContext(connection) as captured:
+                getattr(client, method)(url, data)
+            allocated.append(tracemalloc.get_traced_memory()[1] - baseline)
+            queries.append(len(captured))
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'requests': requests,
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+        'peak_kib': round(statistics.median(allocated) / 1024, 1),
+    }
+
+
+def run(requests=100, views=None, warm=False, random_seed=0):
+    """Замеры по представлениям: {'index': {...}, ...}."""
+    rng = random.Random(random_seed)
+    reader, prepared = scenarios(rng)
+    client = Client()
+    client.force_login(reader)
+    return {
+        name: measure(client, prepare, requests, warm)
+        for name, prepare in prepared.items()
+        if views is None or name in views
+    }
+
+
+def compare(baseline, current, tolerance):
+    """Регрессии относительно прошлого прогона: список строк."""
+    regressions = []
+    for name, result in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['queries'] > before['queries']:
+            regressions.append(
+                f"{name}: запросов {before['queries']} -> "
+                f"{result['queries']}"
+            )
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']} -> {result['p95_ms']} мс"
+            )
+    return regressions
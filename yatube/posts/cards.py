@@ -0,0 +1,63 @@
+"""Карточки постов в лентах.
+
+Карточка — готовый HTML поста из ``posts/includes/post_card.html``,
+общий для главной, группы, профиля, подписок и поиска. Ключ кэша
+собирается из всего, что попадает в карточку: версии поста
+(``updated``), имени автора, группы и адреса миниатюры. Правка поста,
+группы или имени автора, как и готовая миниатюра вместо заглушки, дают
+новый ключ, поэтому явная инвалидация не нужна.
+
+Страница из десяти карточек — одно ``get_many`` к кэшу (и одно — к
+KV-хранилищу миниатюр), а рендер нужен только для промахов.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from core import metrics
+from .thumbnails import POST_THUMBNAILS, thumbnails
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post, thumbnail):
+    author, group = post.author, post.group
+    version = '\n'.join(map(str, (
+        post.updated.isoformat(),
+        author.username, author.first_name, author.last_name,
+        group and group.slug, group and group.title,
+        thumbnail and thumbnail.url,
+    )))
+    return f'post_card:{post.pk}:{hashlib.md5(version.encode()).hexdigest()}'
+
+
+def render_cards(posts):
+    """HTML карточек постов в порядке ``posts``."""
+    posts = list(posts)
+    geometry, options = POST_THUMBNAILS[0]
+    images = thumbnails(
+        [post.image.name for post in posts if post.image], geometry, options
+    )
+    thumbnail_of = {
+        post.pk: images[post.image.name] if post.image else None
+        for post in posts
+    }
+    keys = {post.pk: card_key(post, thumbnail_of[post.pk]) for post in posts}
+    cards = cache.get_many(list(keys.values()))
+
+    missing = [post for post in posts if keys[post.pk] not in cards]
+    metrics.cache_hit(len(posts) - len(missing))
+    metrics.cache_miss(len(missing))
+    if missing:
+        template = get_template(CARD_TEMPLATE)
+        rendered = {
+            keys[post.pk]: template.render(
+                {'post': post, 'thumbnail': thumbnail_of[post.pk]}
+            )
+            for post in missing
+        }
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIME)
+        cards.update(rendered)
+    return [cards[keys[post.pk]] for post in posts]
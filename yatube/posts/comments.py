@@ -0,0 +1,45 @@
+"""Комментарии на странице поста.
+
+Комментарии листаются курсором по (created, id), автор приходит тем же
+запросом. Первая страница популярных постов (не меньше
+``COMMENTS_CACHE_THRESHOLD`` комментариев) кэшируется под поколением
+поста, которое сбрасывается при сохранении и удалении комментария.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+from core.cache import get_generations
+from .paginators import CursorPage, CursorPaginator
+
+
+def comments_generation(post_id):
+    return f'post_comments:{post_id}'
+
+
+def comment_page(post, cursor=None):
+    """Страница комментариев поста, начиная с новых."""
+    paginator = CursorPaginator(
+        post.comments.select_related('author').only(
+            'id', 'text', 'created', 'post', 'author', 'author__username'
+        ),
+        settings.COMMENTS_PER_PAGE,
+        field='created',
+    )
+    if cursor or post.comments_count < settings.COMMENTS_CACHE_THRESHOLD:
+        return paginator.get_page(cursor)
+
+    generation = get_generations([comments_generation(post.pk)])
+    key = f'comments:{post.pk}:{generation}'
+    cached = cache.get(key)
+    if cached is None:
+        metrics.cache_miss()
+        page = paginator.get_page(None)
+        # Сама страница держит QuerySet, который при pickle выполнился бы
+        # целиком, поэтому в кэш кладутся только строки и курсор.
+        cached = (list(page), page.next_cursor)
+        cache.set(key, cached, settings.COMMENTS_CACHE_TIME)
+    else:
+        metrics.cache_hit()
+    rows, next_cursor = cached
+    return CursorPage(rows, paginator, next_cursor, previous_cursor=None)
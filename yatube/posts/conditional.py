@@ -0,0 +1,66 @@
+"""Время изменения и поколения страниц для ``conditional_view``.
+
+Время изменения — самая поздняя правка поста (``updated``) или
+комментария; удаления и изменения, не трогающие дат (имя автора,
+группа, счётчики, вход пользователя), учитываются через поколения и
+зрителя в ETag. Поэтому страницы не отдают Last-Modified: по одному
+If-Modified-Since клиент получил бы 304 после таких изменений.
+"""
+from django.db.models import Max
+
+from .comments import comments_generation
+from .models import Post, User
+from .signals import INDEX_GENERATION, group_generation, profile_generation
+
+
+def latest_update(queryset):
+    return queryset.aggregate(latest=Max('updated'))['latest']
+
+
+def index_modified(request):
+    return latest_update(Post.objects.all())
+
+
+def group_modified(request, slug):
+    return latest_update(Post.objects.filter(group__slug=slug))
+
+
+def profile_modified(request, username):
+    return latest_update(Post.objects.filter(author__username=username))
+
+
+def post_modified(request, post_id):
+    dates = Post.objects.filter(pk=post_id).aggregate(
+        updated=Max('updated'), commented=Max('comments__created')
+    )
+    return max(filter(None, dates.values()), default=None)
+
+
+def post_generations(request, post_id):
+    """Комментарии, автор (имя, число постов) и группа поста — без
+    общего поколения, которое меняет любой новый пост на сайте."""
+    names = [comments_generation(post_id)]
+    ids = (
+        Post.objects.filter(pk=post_id)
+        .values_list('author_id', 'group_id').first()
+    )
+    if ids is not None:
+        author_id, group_id = ids
+        names.append(profile_generation(author_id))
+        if group_id is not None:
+            names.append(group_generation(group_id))
+    return names
+
+
+def profile_generations(request, username):
+    """Счётчики подписок автора и кнопка «Подписаться» зрителя."""
+    names = [INDEX_GENERATION]
+    author_id = (
+        User.objects.filter(username=username)
+        .values_list('pk', flat=True).first()
+    )
+    if author_id is not None:
+        names.append(profile_generation(author_id))
+    if request.user.is_authenticated:
+        names.append(profile_generation(request.user.pk))
+    return names
@@ -0,0 +1,60 @@
+"""Денормализованные счётчики постов, комментариев и подписок.
+
+Счётчики меняются атомарными ``UPDATE ... SET x = x ± 1`` из сигналов,
+``rebuild_counters`` пересчитывает их с нуля.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _shift(queryset, field, delta):
+    queryset.update(**{field: F(field) + delta})
+
+
+def post_added(post, delta=1):
+    _shift(UserStats.objects.filter(user_id=post.author_id),
+           'posts_count', delta)
+
+
+def comment_added(comment, delta=1):
+    _shift(Post.objects.filter(pk=comment.post_id), 'comments_count', delta)
+
+
+def follow_added(follow, delta=1):
+    _shift(UserStats.objects.filter(user_id=follow.author_id),
+           'followers_count', delta)
+    _shift(UserStats.objects.filter(user_id=follow.user_id),
+           'following_count', delta)
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики несколькими запросами UPDATE."""
+    UserStats.objects.bulk_create(
+        [
+            UserStats(user_id=pk)
+            for pk in User.objects.filter(stats__isnull=True)
+            .values_list('pk', flat=True)
+        ],
+        ignore_conflicts=True
+    )
+    UserStats.objects.update(
+        posts_count=_count(Post.objects, 'author'),
+        followers_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment.objects, 'post'))
@@ -0,0 +1,358 @@
+"""Выгрузка и загрузка данных yatube в JSONL и CSV.
+
+Строки читаются через ``values_list(...).iterator(chunk_size=...)`` и
+сразу пишутся в поток, поэтому память не зависит от размера таблиц.
+Внешние ключи выгружаются естественными ключами — username автора и slug
+группы, — а комментарии ссылаются на id поста из той же выгрузки.
+Сжатие gzip идёт на лету через ``zlib.compressobj``.
+
+Загрузка (``load``) читает те же файлы потоком и вставляет строки
+пачками ``bulk_create``: внешние ключи разрешаются по словарям username ->
+id и slug -> id в памяти. Пользователи и группы сливаются с
+существующими по естественным ключам, а id постов и комментариев
+сохраняются, поэтому их загружают только в базу без постов и
+комментариев; счётчики id потом сдвигаются за загруженные.
+``bulk_create`` не посылает сигналов, поэтому счётчики, ленты и
+поисковый индекс пересобираются в конце несколькими запросами.
+
+Этим модулем пользуются команды ``export_yatube``, ``import_yatube`` и
+действия админки.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import search
+from .counters import rebuild_counters
+from .feed import rebuild_feeds
+from .models import Comment, Follow, Group, Post, User
+
+FORMATS = ('jsonl', 'csv')
+CHUNK_SIZE = 2000
+# Сколько байт копится перед отдачей куска потока.
+BUFFER_SIZE = 64 * 1024
+
+# Вид данных -> (базовый QuerySet, {поле выгрузки: поле модели}).
+# Порядок видов — порядок загрузки: сначала то, на что ссылаются.
+KINDS = {
+    'users': (
+        lambda: User.objects.all(),
+        {
+            'username': 'username',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'email': 'email',
+            'date_joined': 'date_joined',
+        },
+    ),
+    'groups': (
+        lambda: Group.objects.all(),
+        {'slug': 'slug', 'title': 'title', 'description': 'description'},
+    ),
+    'posts': (
+        lambda: Post.objects.all(),
+        {
+            'id': 'id',
+            'text': 'text',
+            'pub_date': 'pub_date',
+            'updated': 'updated',
+            'author': 'author__username',
+            'group': 'group__slug',
+            'image': 'image',
+        },
+    ),
+    'comments': (
+        lambda: Comment.objects.all(),
+        {
+            'id': 'id',
+            'post': 'post_id',
+            'author': 'author__username',
+            'text': 'text',
+            'created': 'created',
+        },
+    ),
+    'follows': (
+        lambda: Follow.objects.all(),
+        {'user': 'user__username', 'author': 'author__username'},
+    ),
+}
+
+
+def fields(kind):
+    return list(KINDS[kind][1])
+
+
+def rows(kind, queryset=None, chunk_size=CHUNK_SIZE):
+    """Словари строк вида ``kind`` в порядке id."""
+    base, columns = KINDS[kind]
+    queryset = base() if queryset is None else queryset
+    values = (
+        queryset.order_by('pk')
+        .values_list(*columns.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in values:
+        yield {
+            name: value.isoformat() if isinstance(value, datetime) else value
+            for name, value in zip(columns, row)
+        }
+
+
+def _jsonl_lines(kind, records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(kind, records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields(kind))
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export(kind, format='jsonl', compress=False, queryset=None,
+           chunk_size=CHUNK_SIZE):
+    """Выгрузка вида ``kind``: генератор кусков bytes.
+
+    Подходит и для записи в файл, и для ``StreamingHttpResponse``.
+    """
+    if format not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {format}')
+    lines = (_jsonl_lines if format == 'jsonl' else _csv_lines)(
+        kind, rows(kind, queryset, chunk_size)
+    )
+    # wbits=31 — формат gzip, а не голый zlib.
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def filename(kind, format='jsonl', compress=False):
+    return f'{kind}.{format}' + ('.gz' if compress else '')
+
+
+def kind_of(path):
+    """Вид данных по имени файла выгрузки: posts.csv.gz -> posts."""
+    return os.path.basename(path).split('.')[0]
+
+
+def read(path):
+    """Строки файла выгрузки как словари; формат — по расширению."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as file:
+        if '.csv' in os.path.basename(path):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _batches(records, size):
+    records = iter(records)
+    while True:
+        batch = list(islice(records, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _date(value):
+    return parse_datetime(value) if value else None
+
+
+def _id(value):
+    return int(value) if value not in (None, '') else None
+
+
+@contextmanager
+def original_dates():
+    """Даты из файла вместо auto_now/auto_now_add на время загрузки."""
+    fields = [
+        (Post._meta.get_field('pub_date'), 'auto_now_add'),
+        (Post._meta.get_field('updated'), 'auto_now'),
+        (Comment._meta.get_field('created'), 'auto_now_add'),
+    ]
+    for field, attribute in fields:
+        setattr(field, attribute, False)
+    try:
+        yield
+    finally:
+        for field, attribute in fields:
+            setattr(field, attribute, True)
+
+
+class Loader:
+    """Вставляет строки пачками, разрешая ключи по словарям в памяти."""
+    def __init__(self, batch_size=CHUNK_SIZE):
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        # Только посты из выгрузки: база без постов (см. ``load``).
+        self.posts = set()
+        self.password = make_password(None)
+
+    def load(self, kind, records):
+        """Возвращает (вставлено, пропущено)."""
+        model = {
+            'users': User, 'groups': Group, 'posts': Post,
+            'comments': Comment, 'follows': Follow,
+        }[kind]
+        build = getattr(self, f'_{kind}')
+        before = model.objects.count()
+        skipped = 0
+        for batch in _batches(records, self.batch_size):
+            objects = [build(record) for record in batch]
+            objects = [obj for obj in objects if obj is not None]
+            skipped += len(batch) - len(objects)
+            model.objects.bulk_create(objects, ignore_conflicts=True)
+            self._remember(kind, objects)
+        inserted = model.objects.count() - before
+        return inserted, skipped
+
+    def _remember(self, kind, objects):
+        """Дополняет словари ключами только что вставленной пачки."""
+        if kind == 'users':
+            self.users.update(User.objects.filter(
+                username__in=[user.username for user in objects]
+            ).values_list('username', 'pk'))
+        elif kind == 'groups':
+            self.groups.update(Group.objects.filter(
+                slug__in=[group.slug for group in objects]
+            ).values_list('slug', 'pk'))
+        elif kind == 'posts':
+            self.posts.update(post.pk for post in objects)
+
+    def _users(self, record):
+        return User(
+            username=record['username'],
+            first_name=record.get('first_name') or '',
+            last_name=record.get('last_name') or '',
+            email=record.get('email') or '',
+            date_joined=_date(record.get('date_joined')) or timezone.now(),
+            password=self.password,
+        )
+
+    def _groups(self, record):
+        return Group(
+            slug=record['slug'],
+            title=record['title'],
+            description=record.get('description') or '',
+        )
+
+    def _posts(self, record):
+        author = self.users.get(record['author'])
+        if author is None:
+            return None
+        return Post(
+            id=_id(record['id']),
+            text=record['text'],
+            pub_date=_date(record['pub_date']),
+            updated=_date(record.get('updated') or record['pub_date']),
+            author_id=author,
+            group_id=self.groups.get(record.get('group')),
+            image=record.get('image') or '',
+        )
+
+    def _comments(self, record):
+        author = self.users.get(record['author'])
+        post = _id(record['post'])
+        if author is None or post not in self.posts:
+            return None
+        return Comment(
+            id=_id(record.get('id')),
+            post_id=post,
+            author_id=author,
+            text=record['text'],
+            created=_date(record['created']),
+        )
+
+    def _follows(self, record):
+        user = self.users.get(record['user'])
+        author = self.users.get(record['author'])
+        if user is None or author is None or user == author:
+            return None
+        return Follow(user_id=user, author_id=author)
+
+
+def rebuild_derived():
+    """Счётчики, ленты подписок, поисковый индекс и кэши после загрузки."""
+    rebuild_counters()
+    rebuild_feeds()
+    search.rebuild_index()
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+def reset_sequences():
+    """Сдвигает счётчики id за id, вставленные явно (не нужно SQLite)."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Post, Comment]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def load(paths, batch_size=CHUNK_SIZE):
+    """Загружает файлы выгрузки в порядке зависимостей видов.
+
+    Возвращает {вид: (вставлено, пропущено)}. Посты и комментарии с
+    сохранёнными id загружаются только в базу без них, иначе
+    ``ValueError``.
+    """
+    order = list(KINDS)
+    paths = sorted(paths, key=lambda path: order.index(kind_of(path)))
+    kinds = {kind_of(path) for path in paths}
+    if kinds & {'posts', 'comments'} and (
+        Post.objects.exists() or Comment.objects.exists()
+    ):
+        raise ValueError(
+            'В базе уже есть посты или комментарии: id из выгрузки '
+            'совпали бы с существующими. Загружайте в пустую базу.'
+        )
+    results = {}
+    with transaction.atomic(), original_dates():
+        loader = Loader(batch_size)
+        for path in paths:
+            kind = kind_of(path)
+            inserted, skipped = loader.load(kind, read(path))
+            total = results.get(kind, (0, 0))
+            results[kind] = (total[0] + inserted, total[1] + skipped)
+        reset_sequences()
+        rebuild_derived()
+    return results
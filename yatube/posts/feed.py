@@ -0,0 +1,193 @@
+"""Материализованная лента подписок (fan-out on write).
+
+Новый пост сразу раскладывается по лентам подписчиков автора, поэтому
+``follow_index`` читает один диапазон индекса ``FeedEntry``. Для авторов
+с числом подписчиков больше ``FEED_FANOUT_LIMIT`` запись не выполняется:
+их посты подмешиваются в ленту при чтении (merge-on-read). Когда после
+отписки автор возвращается к порогу, его последние посты раскладываются
+по лентам оставшихся подписчиков (``restore_author``).
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from core.cache import bump_generation
+from .models import FeedEntry, Follow, Post, UserStats
+
+# Поколение, общее для лент всех подписчиков «звёзд»: их посты не
+# раскладываются по лентам, поэтому и кэш сбрасывается не поштучно.
+CELEBRITY_GENERATION = 'follow_feed:celebrities'
+FEED_BATCH_SIZE = 1000
+
+
+def _followers(author_id):
+    """Возвращает id подписчиков или None, если автор — «звезда»."""
+    followers = list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)[:settings.FEED_FANOUT_LIMIT + 1]
+    )
+    if len(followers) > settings.FEED_FANOUT_LIMIT:
+        return None
+    return followers
+
+
+def fan_out_post(post):
+    """Добавляет новый пост в ленты подписчиков автора."""
+    followers = _followers(post.author_id)
+    if not followers:
+        return
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ],
+        ignore_conflicts=True
+    )
+
+
+def _recent_posts(author_id):
+    return list(
+        Post.objects.filter(author_id=author_id)
+        .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+    )
+
+
+def _add_entries(user_ids, posts):
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ),
+        batch_size=FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними постами автора после подписки."""
+    if _followers(author_id) is None:
+        return
+    _add_entries([user_id], _recent_posts(author_id))
+
+
+def restore_author(author_id):
+    """Раскладывает посты бывшей «звезды» по лентам подписчиков.
+
+    Пока подписчиков было больше порога, новые посты автора не попадали
+    в ``FeedEntry``; без этого они пропали бы из лент после отписки.
+    """
+    followers = _followers(author_id)
+    if followers:
+        _add_entries(followers, _recent_posts(author_id))
+
+
+def author_unfollowed(author_id):
+    """Вызывается после отписки и уменьшения счётчика подписчиков."""
+    dropped_to_limit = UserStats.objects.filter(
+        user_id=author_id, followers_count=settings.FEED_FANOUT_LIMIT
+    ).exists()
+    if dropped_to_limit:
+        restore_author(author_id)
+
+
+def remove_author(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        post__author_id=author_id
+    ).delete()
+
+
+def celebrity_ids(user):
+    """Авторы из подписок пользователя, чьи посты читаются при запросе."""
+    return list(
+        Follow.objects.filter(
+            user=user,
+            author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT,
+        )
+        .values_list('author_id', flat=True)
+    )
+
+
+def follow_feed(user):
+    """Посты ленты подписок пользователя, от новых к старым."""
+    celebrities = celebrity_ids(user)
+    if not celebrities:
+        return (
+            Post.objects.filter(feed_entries__user=user)
+            .order_by('-feed_entries__pub_date')
+        )
+    return Post.objects.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('post'))
+        | Q(author_id__in=celebrities)
+    )
+
+
+def rebuild_feed(user_id):
+    """Пересобирает ленту пользователя с нуля."""
+    FeedEntry.objects.filter(user_id=user_id).delete()
+    for author_id in (
+        Follow.objects.filter(user_id=user_id)
+        .values_list('author_id', flat=True)
+    ):
+        backfill(user_id, author_id)
+
+
+def rebuild_feeds():
+    """Пересобирает ленты всех пользователей одним INSERT ... SELECT.
+
+    Каждый подписчик получает ``FEED_BACKFILL_SIZE`` последних постов
+    каждого автора, кроме «звёзд». Нужны актуальные счётчики подписчиков
+    (``rebuild_counters``).
+    """
+    def table(model):
+        return connection.ops.quote_name(model._meta.db_table)
+
+    FeedEntry.objects.all().delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table(FeedEntry)} (user_id, post_id, pub_date)
+            SELECT follow.user_id, post.id, post.pub_date
+            FROM {table(Follow)} follow
+            JOIN {table(UserStats)} stats
+                ON stats.user_id = follow.author_id
+            JOIN (
+                SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+                    PARTITION BY author_id
+                    ORDER BY pub_date DESC, id DESC
+                ) AS position
+                FROM {table(Post)}
+            ) post ON post.author_id = follow.author_id
+            WHERE post.position <= %s AND stats.followers_count <= %s
+            """,
+            [settings.FEED_BACKFILL_SIZE, settings.FEED_FANOUT_LIMIT]
+        )
+
+
+def feed_generation(user_id):
+    return f'follow_feed:{user_id}'
+
+
+def feed_generations(request):
+    """Поколения кэша ленты подписок текущего пользователя."""
+    return feed_generation(request.user.pk), CELEBRITY_GENERATION
+
+
+def invalidate_followers(author_id):
+    """Сбрасывает кэш лент подписчиков автора."""
+    followers = _followers(author_id)
+    if followers is None:
+        bump_generation(CELEBRITY_GENERATION)
+    elif followers:
+        bump_generation(*map(feed_generation, followers))
+
+
+def invalidate_group(group_id):
+    """Сбрасывает кэш лент, в которые могут попасть посты группы."""
+    followers = (
+        Follow.objects.filter(author__posts__group_id=group_id)
+        .values_list('user_id', flat=True).distinct()
+    )
+    bump_generation(*map(feed_generation, followers))
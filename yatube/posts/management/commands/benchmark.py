@@ -0,0 +1,114 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from posts import benchmark
+
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'add_comment', 'profile_follow',
+)
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95/p99, число запросов и память представлений '
+            'posts на отдельной тестовой базе и выводит JSON.')
+
+    def add_arguments(self, parser):
+        dataset = parser.add_argument_group('набор данных')
+        dataset.add_argument('--users', type=int, default=200)
+        dataset.add_argument('--groups', type=int, default=20)
+        dataset.add_argument('--posts', type=int, default=5000)
+        dataset.add_argument('--comments', type=int, default=5000)
+        dataset.add_argument(
+            '--follows', type=int, default=10,
+            help='Подписок на пользователя.'
+        )
+        dataset.add_argument('--seed', type=int, default=0)
+
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Запросов на представление.'
+        )
+        parser.add_argument('--views', nargs='+', choices=VIEWS)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кэши перед запросами.'
+        )
+        parser.add_argument('--output', help='Файл для JSON вместо stdout.')
+        parser.add_argument(
+            '--baseline',
+            help='JSON прошлого прогона: упасть при регрессии.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно --baseline.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должен быть больше нуля')
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'warm_cache': options['warm'],
+            },
+        }
+
+        # Замер идёт на одноразовой тестовой базе, рабочие данные
+        # не трогаются.
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver']):
+                self.stderr.write('Наполняем базу…')
+                report['dataset'] = benchmark.seed(
+                    users=options['users'],
+                    groups=options['groups'],
+                    posts=options['posts'],
+                    comments=options['comments'],
+                    follows=options['follows'],
+                    random_seed=options['seed'],
+                )
+                self.stderr.write('Замеряем…')
+                report['views'] = benchmark.run(
+                    requests=options['requests'],
+                    views=options['views'],
+                    warm=options['warm'],
+                    random_seed=options['seed'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.write(report, options['output'])
+        if options['baseline']:
+            self.check_baseline(report, options)
+
+    def write(self, report, path):
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if path:
+            with open(path, 'w') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    def check_baseline(self, report, options):
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+        regressions = benchmark.compare(
+            baseline.get('views', {}), report['views'], options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stderr.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from posts import benchmark
+
+# Поведение SQLite по умолчанию: журнал отката, полная синхронизация,
+# без mmap; 5 секунд ожидания блокировки — таймаут модуля sqlite3.
+SQLITE_DEFAULTS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+    'mmap_size': 0,
+    'busy_timeout': 5000,
+}
+
+
+class Command(BaseCommand):
+    help = ('Одновременные чтения и записи на отдельной тестовой базе. '
+            'Для SQLite сравнивает настройки по умолчанию с SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Секунд на каждый профиль.'
+        )
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для JSON вместо stdout.')
+
+    def handle(self, *args, **options):
+        profiles = {'configured': settings.SQLITE_PRAGMAS}
+        if connection.vendor == 'sqlite':
+            profiles = {'sqlite_defaults': SQLITE_DEFAULTS, **profiles}
+
+        report = {
+            'meta': {
+                'database': connection.vendor,
+                'readers': options['readers'],
+                'writers': options['writers'],
+                'duration_s': options['duration'],
+            },
+            'profiles': {},
+        }
+        for name, pragmas in profiles.items():
+            self.stderr.write(f'Профиль {name}…')
+            with override_settings(SQLITE_PRAGMAS=pragmas):
+                report['profiles'][name] = {
+                    'pragmas': pragmas if connection.vendor == 'sqlite'
+                    else None,
+                    **self.run_profile(options),
+                }
+
+        text = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    def run_profile(self, options):
+        # Потокам нужна общая база, а не SQLite в памяти, поэтому тестовая
+        # база создаётся файлом во временном каталоге.
+        test_settings = connection.settings_dict['TEST']
+        old_name = connection.settings_dict['NAME']
+        old_test_name = test_settings.get('NAME')
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                test_settings['NAME'] = os.path.join(directory, 'db.sqlite3')
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                benchmark.seed(
+                    users=options['users'], posts=options['posts'],
+                    comments=0, random_seed=options['seed'],
+                )
+                return benchmark.concurrency(
+                    readers=options['readers'],
+                    writers=options['writers'],
+                    duration=options['duration'],
+                    random_seed=options['seed'],
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = old_test_name
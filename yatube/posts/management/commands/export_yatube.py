@@ -0,0 +1,48 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exchange
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и '
+            'подписки в JSONL или CSV, по файлу на вид данных.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds', nargs='*', metavar='kind',
+            help=f'Что выгрузить: {", ".join(exchange.KINDS)}; '
+                 f'по умолчанию всё.'
+        )
+        parser.add_argument(
+            '--format', choices=exchange.FORMATS, default='jsonl'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжимать файлы gzip.'
+        )
+        parser.add_argument(
+            '--output-dir', default='.', help='Каталог для файлов.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=exchange.CHUNK_SIZE,
+            help='Строк за одно чтение из базы.'
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['kinds']) - set(exchange.KINDS)
+        if unknown:
+            raise CommandError(f'Неизвестные виды: {", ".join(unknown)}')
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for kind in options['kinds'] or exchange.KINDS:
+            path = os.path.join(
+                options['output_dir'],
+                exchange.filename(kind, options['format'], options['gzip'])
+            )
+            with open(path, 'wb') as file:
+                for chunk in exchange.export(
+                    kind, options['format'], options['gzip'],
+                    chunk_size=options['chunk_size'],
+                ):
+                    file.write(chunk)
+            self.stdout.write(self.style.SUCCESS(f'{kind}: {path}'))
@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exchange
+
+
+class Command(BaseCommand):
+    help = ('Загружает файлы export_yatube (JSONL или CSV, можно .gz) '
+            'пачками bulk_create и пересобирает счётчики, ленты и '
+            'поисковый индекс. Пользователи и группы с существующими '
+            'ключами пропускаются; id постов и комментариев сохраняются, '
+            'поэтому их загружают только в базу без постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+',
+            help='Файлы вида users.jsonl, posts.csv.gz и т. п.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=exchange.CHUNK_SIZE,
+            help='Строк в одном INSERT.'
+        )
+
+    def handle(self, *args, **options):
+        for path in options['paths']:
+            if not os.path.isfile(path):
+                raise CommandError(f'Нет файла {path}')
+            if exchange.kind_of(path) not in exchange.KINDS:
+                raise CommandError(
+                    f'{path}: имя файла должно начинаться с одного из: '
+                    f'{", ".join(exchange.KINDS)}'
+                )
+        try:
+            results = exchange.load(options['paths'], options['batch_size'])
+        except ValueError as error:
+            raise CommandError(error)
+        for kind, (inserted, skipped) in results.items():
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: вставлено {inserted}, пропущено {skipped}'
+            ))
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class InlineExecutor:
+    """Исполнитель без процессов для --workers 1."""
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class Command(BaseCommand):
+    help = ('Нарезает миниатюры всех картинок постов на всех ядрах. '
+            'Готовые миниатюры пропускаются, прерванный прогон '
+            'продолжается с последнего обработанного поста.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов (1 — без пула).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько постов обрабатывать между контрольными точками.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=os.path.join(settings.MEDIA_ROOT, '.warm_thumbnails'),
+            help='Файл с id последнего обработанного поста.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первого поста, игнорируя контрольную точку.'
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        last_pk = 0 if options['restart'] else self.read_checkpoint(
+            checkpoint
+        )
+        if last_pk:
+            self.stdout.write(f'Продолжаем после поста {last_pk}')
+
+        self.backend = thumbnails.QueuedThumbnailBackend()
+        self.stats = {'generated': 0, 'skipped': 0, 'failed': 0}
+        self.started = time.monotonic()
+
+        executor = self.get_executor(options['workers'])
+        try:
+            while True:
+                batch = list(
+                    Post.objects.filter(pk__gt=last_pk)
+                    .exclude(image='')
+                    .order_by('pk')
+                    .values_list('pk', 'image')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                self.process(executor, batch)
+                last_pk = batch[-1][0]
+                self.write_checkpoint(checkpoint, last_pk)
+                self.report()
+        finally:
+            executor.shutdown(wait=True)
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.report(final=True)
+
+    def get_executor(self, workers):
+        if workers <= 1:
+            return InlineExecutor()
+        # Процессы запускаются через spawn и открывают свои соединения,
+        # поэтому родительские соединения в них не наследуются.
+        connections.close_all()
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=thumbnails.setup_worker,
+        )
+
+    def process(self, executor, batch):
+        futures = []
+        for _, name in batch:
+            for geometry, options in thumbnails.POST_THUMBNAILS:
+                if self.backend.lookup(name, geometry, **options):
+                    self.stats['skipped'] += 1
+                    continue
+                futures.append(executor.submit(
+                    thumbnails.generate, name, geometry, options
+                ))
+        for future in wait(futures).done:
+            if future.exception() is None:
+                self.stats['generated'] += 1
+            else:
+                self.stats['failed'] += 1
+                self.stderr.write(f'Ошибка: {future.exception()!r}')
+
+    def report(self, final=False):
+        elapsed = time.monotonic() - self.started
+        rate = self.stats['generated'] / elapsed if elapsed else 0
+        line = (
+            f"нарезано {self.stats['generated']}, "
+            f"пропущено {self.stats['skipped']}, "
+            f"ошибок {self.stats['failed']}, "
+            f'{rate:.1f} миниатюр/с, {elapsed:.1f} с'
+        )
+        if final:
+            self.stdout.write(self.style.SUCCESS(f'Готово: {line}'))
+        else:
+            self.stdout.write(line)
+
+    @staticmethod
+    def read_checkpoint(path):
+        try:
+            with open(path) as file:
+                return int(file.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    @staticmethod
+    def write_checkpoint(path, pk):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(str(pk))
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:42
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.db import DatabaseError, migrations, models, transaction
+import django.db.models.deletion
+
+# Схема и токенизатор на момент миграции: posts.search может меняться,
+# а эта миграция должна строить тот же индекс, что и раньше.
+FTS_TABLE = 'posts_post_fts'
+FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, "
+    f"tokenize='unicode61')"
+)
+TERM_MAX_LENGTH = 64
+BATCH_SIZE = 1000
+
+
+def tokenize(text):
+    folded = ''.join(
+        char for char in unicodedata.normalize('NFKD', text.lower())
+        if not unicodedata.combining(char)
+    )
+    return [
+        word[:TERM_MAX_LENGTH] for word in re.findall(r'[^\W_]+', folded)
+    ]
+
+
+def create_fts(schema_editor):
+    """Создаёт таблицу FTS5; False, если SQLite собран без неё."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with transaction.atomic(using=connection.alias):
+            schema_editor.execute(FTS_SCHEMA)
+    except DatabaseError:
+        return False
+    return True
+
+
+def fill_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    posts = Post.objects.values_list('pk', 'text').iterator(
+        chunk_size=BATCH_SIZE
+    )
+    if create_fts(schema_editor):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)',
+                ((pk, ' '.join(tokenize(text))) for pk, text in posts)
+            )
+        return
+    for pk, text in posts:
+        SearchTerm.objects.bulk_create(
+            SearchTerm(term=term, post_id=pk, weight=weight)
+            for term, weight in Counter(tokenize(text)).items()
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term_post'),
+        ),
+        migrations.RunPython(fill_search_index, drop_fts),
+    ]
@@ -14,9 +14,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related('author', 'group').only(
+            'id',
+            'text',
+            'pub_date',
+            'updated',
+            'image',
+            'author',
+            'group',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__title',
+            'group__slug',
+        )
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,12 +54,41 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:settings.SYMBOLS_COUNT]
 
     class Meta:
         ordering = ['-pub_date']
+        # id замыкает ключ keyset-пагинации (pub_date, id), иначе SQLite
+        # досортировывает страницу во временном B-дереве.
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            # Max('updated') для ETag лент читает последнюю запись индекса.
+            models.Index(fields=['updated'], name='post_updated_idx'),
+            models.Index(
+                fields=['author', 'updated'],
+                name='post_author_updated_idx'
+            ),
+            models.Index(
+                fields=['group', 'updated'],
+                name='post_group_updated_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -61,6 +110,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -77,7 +132,79 @@ class Follow(models.Model):
     )
 
     class Meta:
-        models.UniqueConstraint(
-            fields=['user', 'author'],
-            name='unique_user_author'
-        )
+        # Уникальный индекс (user_id, author_id) заодно обслуживает
+        # проверки подписки и выборку подписок пользователя.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_user_author'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+
+    # Копия Post.pub_date, чтобы страница ленты читалась одним
+    # диапазоном индекса (user, -pub_date).
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_user_post'
+            ),
+        ]
+
+
+class SearchTerm(models.Model):
+    """Обратный индекс поиска, если SQLite собран без FTS5."""
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    # Сколько раз слово встречается в тексте поста.
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        # Уникальный индекс (term, post_id) — список постов для слова.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_term_post'
+            ),
+        ]
@@ -0,0 +1,130 @@
+"""Keyset-пагинация по (дата, id) без COUNT(*) и OFFSET."""
+import base64
+import binascii
+import json
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def pack_cursor(*values):
+    """Непрозрачный токен из JSON-совместимых значений."""
+    payload = json.dumps(values, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def unpack_cursor(token):
+    """Значения из токена ``pack_cursor`` или None для битого токена."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def encode_cursor(direction, value, pk):
+    return pack_cursor(direction, value.isoformat(), pk)
+
+
+def decode_cursor(token):
+    """Возвращает (direction, дата, pk) или None для битого курсора."""
+    try:
+        direction, value, pk = unpack_cursor(token)
+        value = parse_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None:
+        return None
+    if not isinstance(pk, int):
+        return None
+    return direction, value, pk
+
+
+class CursorPage(Page):
+    """Страница без номера: вместо него курсоры соседних страниц."""
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор по ключу (field, id) с непрозрачными токенами.
+
+    Новые записи идут первыми; ``field`` — поле даты, по умолчанию дата
+    публикации поста.
+    """
+    def __init__(self, object_list, per_page, field='pub_date', **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.field = field
+
+    def page(self, cursor):
+        queryset = self.object_list
+        position = decode_cursor(cursor) if cursor else None
+        newest_first = (f'-{self.field}', '-pk')
+
+        if position is None:
+            rows = list(queryset.order_by(*newest_first)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return CursorPage(
+                rows, self,
+                next_cursor=self._cursor(NEXT, rows, has_more),
+                previous_cursor=None,
+            )
+
+        direction, value, pk = position
+        if direction == NEXT:
+            rows = list(
+                queryset.filter(
+                    Q(**{f'{self.field}__lt': value})
+                    | Q(**{self.field: value, 'pk__lt': pk})
+                ).order_by(*newest_first)[:self.per_page + 1]
+            )
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            return CursorPage(
+                rows, self,
+                next_cursor=self._cursor(NEXT, rows, has_more),
+                previous_cursor=self._cursor(PREVIOUS, rows, bool(rows)),
+            )
+
+        rows = list(
+            queryset.filter(
+                Q(**{f'{self.field}__gt': value})
+                | Q(**{self.field: value, 'pk__gt': pk})
+            ).order_by(self.field, 'pk')[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows, self,
+            next_cursor=self._cursor(NEXT, rows, bool(rows)),
+            previous_cursor=self._cursor(PREVIOUS, rows, has_more),
+        )
+
+    def get_page(self, cursor):
+        return self.page(cursor)
+
+    def _cursor(self, direction, rows, condition):
+        if not condition:
+            return None
+        edge = rows[-1] if direction == NEXT else rows[0]
+        return encode_cursor(direction, getattr(edge, self.field), edge.pk)
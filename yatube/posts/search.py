@@ -0,0 +1,198 @@
+"""Полнотекстовый поиск по постам.
+
+Индекс — виртуальная таблица FTS5 ``posts_post_fts`` (rowid = id поста),
+если SQLite собран с FTS5, иначе обратный индекс ``SearchTerm``. Индекс
+обновляется из сигналов при сохранении и удалении поста.
+
+Выдача упорядочена по (score, id), меньший score — лучшее совпадение,
+и листается курсором по этой паре без OFFSET.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Q, Sum
+
+from .models import Post, SearchTerm
+from .paginators import CursorPage, pack_cursor, unpack_cursor
+
+FTS_TABLE = 'posts_post_fts'
+FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(text, "
+    f"tokenize='unicode61')"
+)
+MAX_QUERY_TERMS = 8
+REBUILD_BATCH_SIZE = 1000
+
+_fts_tables = {}
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, без диакритики (ё — е)."""
+    folded = ''.join(
+        char for char in unicodedata.normalize('NFKD', text.lower())
+        if not unicodedata.combining(char)
+    )
+    max_length = SearchTerm._meta.get_field('term').max_length
+    return [word[:max_length] for word in re.findall(r'[^\W_]+', folded)]
+
+
+def terms(text):
+    """Слова текста с числом вхождений."""
+    return Counter(tokenize(text))
+
+
+def document(text):
+    """Текст для FTS5: unicode61 не снимает диакритику с кириллицы,
+    поэтому в таблицу пишутся уже нормализованные слова."""
+    return ' '.join(tokenize(text))
+
+
+def use_fts():
+    if not settings.SEARCH_FTS or connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _fts_tables:
+        _fts_tables[name] = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[name]
+
+
+def index_post(post):
+    """Заменяет записи поста в индексе."""
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)',
+                [post.pk, document(post.text)]
+            )
+        return
+    SearchTerm.objects.filter(post_id=post.pk).delete()
+    SearchTerm.objects.bulk_create(_search_terms(post.pk, post.text))
+
+
+def remove_post(post_id):
+    # Строки SearchTerm удаляет каскад, FTS5 про внешние ключи не знает.
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def rebuild_index():
+    """Строит индекс заново по всем постам."""
+    posts = Post.objects.values_list('pk', 'text')
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        fill_fts(connection, posts.iterator(chunk_size=REBUILD_BATCH_SIZE))
+        return
+    SearchTerm.objects.all().delete()
+    for batch in _batches(posts, REBUILD_BATCH_SIZE):
+        SearchTerm.objects.bulk_create(
+            term for pk, text in batch for term in _search_terms(pk, text)
+        )
+
+
+def fill_fts(db, rows):
+    """Записывает пары (id, текст) в таблицу FTS5."""
+    with db.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)',
+            ((pk, document(text)) for pk, text in rows)
+        )
+
+
+def search(query, cursor=None, per_page=None):
+    """Страница найденных постов; все слова запроса обязательны."""
+    per_page = per_page or settings.POSTS_PER_PAGE
+    words = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not words:
+        return CursorPage([], None, next_cursor=None, previous_cursor=None)
+
+    position = _decode(cursor) if cursor else None
+    find = _fts_matches if use_fts() else _index_matches
+    rows = find(words, position, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    posts = Post.objects.for_feed().in_bulk([pk for pk, _ in rows])
+    return CursorPage(
+        [posts[pk] for pk, _ in rows if pk in posts], None,
+        next_cursor=pack_cursor(rows[-1][1], rows[-1][0])
+        if has_more else None,
+        previous_cursor=None,
+    )
+
+
+def _search_terms(post_id, text):
+    return [
+        SearchTerm(term=term, post_id=post_id, weight=weight)
+        for term, weight in terms(text).items()
+    ]
+
+
+def _batches(queryset, size):
+    batch = []
+    for row in queryset.iterator(chunk_size=size):
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _decode(cursor):
+    """(score, pk) из курсора или None."""
+    try:
+        score, pk = unpack_cursor(cursor)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(score, (int, float)) or not isinstance(pk, int):
+        return None
+    return score, pk
+
+
+def _fts_matches(words, position, limit):
+    """(id, bm25) совпадений FTS5; bm25 отрицателен, меньше — лучше."""
+    sql = (
+        f'SELECT rowid, rank FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [' '.join(f'"{word}"' for word in words)]
+    if position:
+        score, pk = position
+        sql += ' AND (rank > %s OR (rank = %s AND rowid > %s))'
+        params += [score, score, pk]
+    sql += ' ORDER BY rank, rowid LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _index_matches(words, position, limit):
+    """(id, -сумма вхождений) постов, где есть все слова запроса."""
+    matches = (
+        SearchTerm.objects.filter(term__in=words)
+        .values('post_id')
+        .annotate(score=Sum(-F('weight')), matched=Count('term'))
+        .filter(matched=len(words))
+    )
+    if position:
+        score, pk = position
+        matches = matches.filter(
+            Q(score__gt=score) | Q(score=score, post_id__gt=pk)
+        )
+    return list(
+        matches.order_by('score', 'post_id')
+        .values_list('post_id', 'score')[:limit]
+    )
@@ -0,0 +1,120 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cache import bump_generation
+from . import counters, feed, search, thumbnails
+from .comments import comments_generation
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+INDEX_GENERATION = 'index_page'
+
+
+def profile_generation(user_id):
+    return f'profile:{user_id}'
+
+
+def group_generation(group_id):
+    return f'group:{group_id}'
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+    update_fields = kwargs.get('update_fields')
+    if not created and (
+        update_fields is None
+        or {'first_name', 'last_name'} & set(update_fields)
+    ):
+        bump_generation(INDEX_GENERATION, profile_generation(instance.pk))
+        feed.invalidate_followers(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.post_added(instance)
+        feed.fan_out_post(instance)
+        # Число постов автора на его страницах.
+        bump_generation(profile_generation(instance.author_id))
+    bump_generation(INDEX_GENERATION)
+    feed.invalidate_followers(instance.author_id)
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None or 'text' in update_fields:
+        search.index_post(instance)
+    if instance.image:
+        thumbnails.queue_post_thumbnails(instance.image.name)
+
+
+@receiver(thumbnails.thumbnail_ready)
+def thumbnail_ready(sender, name, **kwargs):
+    """Сбрасывает кэши и валидаторы страниц, где была заглушка."""
+    posts = Post.objects.filter(image=name)
+    authors = set(posts.values_list('author_id', flat=True))
+    if not authors:
+        return
+    # Новый updated меняет Last-Modified и ключи карточек.
+    posts.update(updated=timezone.now())
+    bump_generation(INDEX_GENERATION)
+    for author_id in authors:
+        feed.invalidate_followers(author_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_added(instance, delta=-1)
+    search.remove_post(instance.pk)
+    bump_generation(INDEX_GENERATION, profile_generation(instance.author_id))
+    feed.invalidate_followers(instance.author_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_generation(INDEX_GENERATION, group_generation(instance.pk))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_feeds_changed(sender, instance, **kwargs):
+    """Ленты подписок на авторов группы. При удалении — до того, как
+    посты отвяжутся от группы."""
+    feed.invalidate_group(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.comment_added(instance)
+    bump_generation(comments_generation(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.comment_added(instance, delta=-1)
+    bump_generation(comments_generation(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.follow_added(instance)
+        feed.backfill(instance.user_id, instance.author_id)
+        bump_generation(
+            feed.feed_generation(instance.user_id),
+            profile_generation(instance.user_id),
+            profile_generation(instance.author_id),
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.follow_added(instance, delta=-1)
+    feed.remove_author(instance.user_id, instance.author_id)
+    feed.author_unfollowed(instance.author_id)
+    bump_generation(
+        feed.feed_generation(instance.user_id),
+        profile_generation(instance.user_id),
+        profile_generation(instance.author_id),
+    )
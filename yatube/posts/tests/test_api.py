@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    """JSON API: содержимое, курсоры и условные запросы."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feeds(self):
+        urls = [
+            reverse('api:index'),
+            reverse('api:group_list', args=[self.group.slug]),
+            reverse('api:profile', args=[self.author.username]),
+            reverse('api:follow_index'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                data = self.client.get(url).json()
+                self.assertEqual(data['results'][0], {
+                    'id': self.post.pk,
+                    'url': reverse('posts:post_detail', args=[self.post.pk]),
+                    'text': 'Пост в группе',
+                    'pub_date': self.post.pub_date.isoformat(),
+                    'author': {'username': 'author',
+                               'full_name': 'Лев Толстой'},
+                    'group': {'slug': 'group', 'title': 'Группа'},
+                    'image': None,
+                })
+                self.assertIsNone(data['next'])
+
+    def test_cursor_pages(self):
+        for number in range(12):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        first = self.client.get(reverse('api:index')).json()
+        second = self.client.get(first['next']).json()
+
+        self.assertEqual(len(first['results']), 10)
+        self.assertEqual(len(second['results']), 3)
+        self.assertEqual(second['results'][-1]['id'], self.post.pk)
+        self.assertIsNone(second['next'])
+
+    def test_post_detail_with_comments(self):
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        data = self.client.get(
+            reverse('api:post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(data['comments_count'], 1)
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']['results']],
+            ['Комментарий']
+        )
+
+    def test_follow_requires_login(self):
+        response = Client().get(reverse('api:follow_index'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag получает 304 без сборки страницы."""
+        url = reverse('api:index')
+        client = Client()
+        etag = client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        # Лента может стать старее после удаления: проверка только по ETag.
+        self.assertNotIn('Last-Modified', response)
+
+    def test_changes_update_etag(self):
+        """Новый пост, правка и комментарий меняют ETag."""
+        changes = {
+            'api:index': lambda: Post.objects.create(
+                text='Новый', author=self.author
+            ),
+            'api:follow_index': lambda: Post.objects.create(
+                text='Ещё один', author=self.author
+            ),
+            'api:post_detail': lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Новый'
+            ),
+            'api:group_list': lambda: Post.objects.filter(
+                pk=self.post.pk
+            ).first().save(),
+        }
+        args = {
+            'api:post_detail': [self.post.pk],
+            'api:group_list': [self.group.slug],
+        }
+        for name, change in changes.items():
+            with self.subTest(name=name):
+                url = reverse(name, args=args.get(name))
+                etag = self.client.get(url)['ETag']
+                change()
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
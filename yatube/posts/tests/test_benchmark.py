@@ -0,0 +1,31 @@
+from django.test import TestCase
+
+from posts import benchmark
+
+
+class BenchmarkTests(TestCase):
+    """Бенчмарк наполняет базу и меряет все представления."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed(users=5, groups=2, posts=15, comments=5, follows=2)
+
+    def test_run_reports_every_view(self):
+        results = benchmark.run(requests=2)
+
+        self.assertEqual(set(results), {
+            'index', 'group_posts', 'profile', 'post_detail',
+            'follow_index', 'add_comment', 'profile_follow',
+        })
+        for name, result in results.items():
+            with self.subTest(view=name):
+                self.assertLess(max(result['status']), 400)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['queries'], 0)
+
+    def test_compare_flags_regressions(self):
+        before = {'index': {'queries': 3, 'p95_ms': 10.0}}
+        after = {'index': {'queries': 4, 'p95_ms': 13.0}}
+
+        self.assertEqual(len(benchmark.compare(before, after, 0.2)), 2)
+        self.assertEqual(benchmark.compare(before, before, 0.2), [])
@@ -0,0 +1,98 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import cards, thumbnails
+from posts.models import Group, Post
+from posts.tests.test_thumbnails import png
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostCardsTests(TestCase):
+    """Карточки берутся из кэша и обновляются вместе с содержимым."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def render(self):
+        return cards.render_cards(Post.objects.for_feed())
+
+    def test_cached_cards_are_not_rendered(self):
+        first = self.render()
+        with mock.patch.object(cards, 'get_template') as get_template:
+            with self.assertNumQueries(1):
+                second = self.render()
+        get_template.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertIn('Пост 2', first[0])
+        self.assertIn('Лев Толстой', first[0])
+
+    def test_changes_render_new_card(self):
+        def edit():
+            post = Post.objects.get(text='Пост 2')
+            post.text = 'Исправленный пост'
+            post.save()
+
+        def rename_author():
+            self.author.first_name = 'Фёдор'
+            self.author.save()
+
+        def rename_group():
+            self.group.slug = 'new-group'
+            self.group.save()
+
+        changes = [
+            (edit, 'Исправленный пост'),
+            (rename_author, 'Фёдор Толстой'),
+            (rename_group, '/group/new-group/'),
+        ]
+        for change, expected in changes:
+            with self.subTest(expected=expected):
+                before = self.render()
+                change()
+                after = self.render()
+                self.assertNotEqual(before[0], after[0])
+                self.assertIn(expected, after[0])
+
+    def test_ready_thumbnail_replaces_placeholder(self):
+        post = Post.objects.create(
+            text='С картинкой', author=self.author, image=png('card.png')
+        )
+        with mock.patch.object(thumbnails,
+                               'enqueue_thumbnails') as enqueue:
+            card = self.render()[0]
+        self.assertIn('data:image/svg+xml', card)
+        enqueue.assert_called_once()
+
+        for geometry, options in thumbnails.POST_THUMBNAILS:
+            thumbnails.generate(post.image.name, geometry, options)
+        card = self.render()[0]
+
+        self.assertNotIn('data:image/svg+xml', card)
+        self.assertIn(settings.MEDIA_URL + 'cache/', card)
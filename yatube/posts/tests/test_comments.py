@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.testing import QueryAssertionsMixin
+from posts.models import Comment, Post, User
+
+
+@override_settings(COMMENTS_PER_PAGE=5, COMMENTS_CACHE_THRESHOLD=10)
+class CommentPagesTests(QueryAssertionsMixin, TestCase):
+    """Комментарии листаются курсором, популярные кэшируются."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.hot = Post.objects.create(text='Популярный', author=cls.author)
+        cls.quiet = Post.objects.create(text='Тихий', author=cls.author)
+        for i in range(12):
+            Comment.objects.create(
+                post=cls.hot, text=f'Комментарий {i}',
+                author=User.objects.create_user(username=f'reader{i}'),
+            )
+        Comment.objects.create(post=cls.quiet, text='Один', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('posts:post_detail', args=[self.hot.pk])
+
+    def comment_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "posts_comment"' in query['sql']
+        ]
+
+    def test_cursor_pages_cover_all_comments(self):
+        seen = []
+        cursor = None
+        while True:
+            response = self.client.get(self.url, {'comments': cursor or ''})
+            page = response.context['comments']
+            self.assertLessEqual(len(page), settings.COMMENTS_PER_PAGE)
+            seen += [comment.text for comment in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(
+            seen, [f'Комментарий {i}' for i in reversed(range(12))]
+        )
+
+    def test_authors_are_joined(self):
+        self.assertNoRepeatedQueries(lambda: self.client.get(self.url))
+
+    def test_hot_post_comments_are_cached(self):
+        self.comment_queries(self.url)
+        response, queries = self.comment_queries(self.url)
+        self.assertEqual(queries, [])
+        self.assertEqual(len(response.context['comments']), 5)
+
+        Comment.objects.create(post=self.hot, text='Свежий',
+                               author=self.author)
+        response, queries = self.comment_queries(self.url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.context['comments'][0].text, 'Свежий')
+
+    def test_quiet_post_is_not_cached(self):
+        url = reverse('posts:post_detail', args=[self.quiet.pk])
+        self.comment_queries(url)
+        _, queries = self.comment_queries(url)
+        self.assertEqual(len(queries), 1)
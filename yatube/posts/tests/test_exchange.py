@@ -0,0 +1,187 @@
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import exchange, search
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    """Выгрузка потоком в JSONL и CSV, с gzip и без."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group if number else None)
+            for number in range(3)
+        ]
+        cls.comment = Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def read(self, kind, format='jsonl', compress=False, **kwargs):
+        data = b''.join(exchange.export(kind, format, compress, **kwargs))
+        if compress:
+            data = gzip.decompress(data)
+        text = data.decode()
+        if format == 'csv':
+            return list(csv.DictReader(io.StringIO(text)))
+        return [json.loads(line) for line in text.splitlines()]
+
+    def test_jsonl(self):
+        posts = self.read('posts', chunk_size=2)
+        self.assertEqual([post['id'] for post in posts],
+                         [post.pk for post in self.posts])
+        self.assertEqual(posts[0]['author'], 'author')
+        self.assertIsNone(posts[0]['group'])
+        self.assertEqual(posts[1]['group'], 'group')
+        self.assertEqual(posts[0]['pub_date'],
+                         self.posts[0].pub_date.isoformat())
+        self.assertEqual(
+            self.read('comments'),
+            [{'id': self.comment.pk, 'post': self.posts[0].pk,
+              'author': 'reader', 'text': 'Комментарий',
+              'created': self.comment.created.isoformat()}]
+        )
+        self.assertEqual(self.read('follows'),
+                         [{'user': 'reader', 'author': 'author'}])
+
+    def test_csv_gzip(self):
+        posts = self.read('posts', 'csv', compress=True)
+        self.assertEqual(list(posts[0]), exchange.fields('posts'))
+        self.assertEqual([post['text'] for post in posts],
+                         ['Пост 0', 'Пост 1', 'Пост 2'])
+        self.assertEqual(posts[0]['group'], '')
+
+    def test_streams_in_chunks(self):
+        """Куски отдаются по мере чтения, а не одной строкой в конце."""
+        with mock.patch.object(exchange, 'BUFFER_SIZE', 1):
+            chunks = list(exchange.export('posts', chunk_size=1))
+        self.assertEqual(len(chunks), len(self.posts))
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        call_command('export_yatube', '--gzip', '--output-dir', directory,
+                     stdout=StringIO())
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            sorted(f'{kind}.jsonl.gz' for kind in exchange.KINDS)
+        )
+        with gzip.open(os.path.join(directory, 'users.jsonl.gz'),
+                       'rt') as file:
+            usernames = [json.loads(line)['username'] for line in file]
+        self.assertEqual(usernames, ['author', 'reader'])
+
+    def test_admin_action(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': [self.posts[1].pk, self.posts[2].pk],
+        })
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="posts.csv.gz"')
+        text = gzip.decompress(b''.join(response.streaming_content))
+        rows = list(csv.DictReader(io.StringIO(text.decode())))
+        self.assertEqual([row['text'] for row in rows],
+                         ['Пост 1', 'Пост 2'])
+
+
+class ImportTests(TestCase):
+    """Загрузка выгрузки в пустую базу с пересборкой производных данных."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(username='author', last_name='Ли')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        post = Post.objects.create(text='Ёжик в тумане', author=author,
+                                   group=group)
+        Post.objects.create(text='Без группы', author=author)
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+        Follow.objects.create(user=reader, author=author)
+        cls.snapshot = {
+            kind: list(exchange.rows(kind)) for kind in exchange.KINDS
+        }
+        for kind in exchange.KINDS:
+            # Половина файлов в CSV: загрузчик читает оба формата.
+            format = 'csv' if kind in ('groups', 'comments') else 'jsonl'
+            path = os.path.join(cls.directory,
+                                exchange.filename(kind, format, True))
+            with open(path, 'wb') as file:
+                for chunk in exchange.export(kind, format, compress=True):
+                    file.write(chunk)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def paths(self):
+        return [os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)]
+
+    def test_round_trip(self):
+        out = StringIO()
+        call_command('import_yatube', *self.paths(), '--batch-size', '1',
+                     stdout=out)
+
+        self.assertIn('posts: вставлено 2, пропущено 0', out.getvalue())
+        self.assertEqual(
+            {kind: list(exchange.rows(kind)) for kind in exchange.KINDS},
+            self.snapshot
+        )
+        author = User.objects.get(username='author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.stats.posts_count, 2)
+        self.assertEqual(author.stats.followers_count, 1)
+        self.assertEqual(Post.objects.get(text='Ёжик в тумане')
+                         .comments_count, 1)
+        reader = User.objects.get(username='reader')
+        self.assertEqual(reader.feed_entries.count(), 2)
+        self.assertEqual([post.text for post in search.search('ежик')],
+                         ['Ёжик в тумане'])
+
+    def test_posts_are_loaded_only_into_empty_database(self):
+        """Сохранённые id постов не должны совпасть с существующими."""
+        call_command('import_yatube', *self.paths(), stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'пустую базу'):
+            call_command('import_yatube', *self.paths(), stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+        # Пользователи сливаются по username.
+        users = [path for path in self.paths()
+                 if exchange.kind_of(path) == 'users']
+        out = StringIO()
+        call_command('import_yatube', *users, stdout=out)
+        self.assertIn('users: вставлено 0, пропущено 0', out.getvalue())
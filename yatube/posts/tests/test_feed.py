@@ -0,0 +1,178 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.counters import rebuild_counters
+from posts.feed import rebuild_feeds
+from posts.models import FeedEntry, Follow, Group, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    """Проверка материализованной ленты подписок."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.user = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def feed(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post])
+
+    def test_follow_backfills_and_unfollow_clears(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(3)
+        ]
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(set(self.feed()), set(posts))
+
+        Follow.objects.get(user=self.user, author=self.author).delete()
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_celebrity_posts_are_merged_on_read(self):
+        """Посты «звезды» не пишутся в ленты, но видны подписчикам."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(), [post])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_former_celebrity_posts_stay_after_unfollow(self):
+        """Посты, опубликованные «звездой», остаются в ленте, когда
+        подписчиков снова не больше порога."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='Пост звезды', author=self.author)
+        self.assertEqual(self.feed(), [post])
+
+        Follow.objects.get(user=other).delete()
+        cache.clear()
+
+        self.assertEqual(self.feed(), [post])
+        self.assertFalse(FeedEntry.objects.filter(user=other).exists())
+
+    @override_settings(FEED_BACKFILL_SIZE=2, FEED_FANOUT_LIMIT=1)
+    def test_rebuild_feeds(self):
+        """Все ленты пересобираются без запросов на подписку."""
+        star = User.objects.create_user(username='star')
+        other = User.objects.create_user(username='other')
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(3)
+        ]
+        Post.objects.create(text='Пост звезды', author=star)
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.user, author=star)
+        Follow.objects.create(user=other, author=star)
+        FeedEntry.objects.all().delete()
+        rebuild_counters()
+
+        with self.assertNumQueries(2):
+            rebuild_feeds()
+
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('user', 'post')),
+            {(self.user.pk, post.pk) for post in posts[1:]}
+        )
+
+
+class FollowFeedCacheTests(TestCase):
+    """Кэш ленты подписок сбрасывается только у затронутых читателей."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        cls.user = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.user, author=cls.author)
+        Post.objects.create(text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+        self.url = reverse('posts:follow_index')
+        self.authorized_client.get(self.url)
+
+    def test_feed_page_is_cached_per_user(self):
+        """Повторный запрос ленты не читает посты из базы."""
+        # Остаются только сессия и пользователь
+        with self.assertNumQueries(2):
+            self.authorized_client.get(self.url)
+
+        Post.objects.create(text='Чужой пост', author=self.stranger)
+        with self.assertNumQueries(2):
+            self.authorized_client.get(self.url)
+
+    def test_author_post_invalidates_follower_feed(self):
+        """Пост, правка и удаление у автора сбрасывают ленту подписчика."""
+        post = Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertContains(self.authorized_client.get(self.url), post.text)
+
+        post.text = 'Исправленный пост'
+        post.save()
+        self.assertContains(self.authorized_client.get(self.url), post.text)
+
+        post.delete()
+        self.assertNotContains(
+            self.authorized_client.get(self.url), post.text
+        )
+
+    def test_group_change_invalidates_follower_feed(self):
+        """Новый адрес группы и её удаление видны в кэшированной ленте."""
+        group = Group.objects.create(
+            title='Группа', slug='old-slug', description='-'
+        )
+        Post.objects.create(text='Пост в группе', author=self.author,
+                            group=group)
+        self.assertContains(self.authorized_client.get(self.url),
+                            '/group/old-slug/')
+
+        group.slug = 'new-slug'
+        group.save()
+        self.assertContains(self.authorized_client.get(self.url),
+                            '/group/new-slug/')
+
+        group.delete()
+        self.assertNotContains(self.authorized_client.get(self.url),
+                               '/group/new-slug/')
+
+    def test_unfollow_invalidates_own_feed(self):
+        """Отписка сразу убирает посты автора из ленты."""
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow',
+                    kwargs={'username': self.author.username})
+        )
+        self.assertNotContains(
+            self.authorized_client.get(self.url), 'Старый пост'
+        )
+
+    @override_settings(FOLLOW_CACHE_PAGES=0)
+    def test_only_first_pages_are_cached(self):
+        """Страницы за пределом FOLLOW_CACHE_PAGES не кэшируются."""
+        response = self.authorized_client.get(self.url)
+        self.assertIsNotNone(response.context)
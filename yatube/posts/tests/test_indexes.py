@@ -0,0 +1,104 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import conditional
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class FeedIndexesTest(TestCase):
+    """Списки постов читаются по индексу, без сортировки в памяти."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            text='Тестовый текст', group=cls.group, author=cls.author
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def plan(self, url, table):
+        """План запроса к ``table``, выполненного при открытии ``url``."""
+        with CaptureQueriesContext(connection) as queries:
+            self.authorized_client.get(url)
+        # Последний запрос к таблице — выборка страницы (COUNT идёт раньше)
+        sql = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and f'FROM "{table}"' in query['sql']
+        ][-1]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return '\n'.join(row[-1] for row in cursor.fetchall())
+
+    def test_list_views_use_index_scans(self):
+        cases = [
+            (reverse('posts:index'), 'posts_post', 'post_pub_date_idx'),
+            (reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+             'posts_post', 'post_group_pub_date_idx'),
+            (reverse('posts:profile',
+                     kwargs={'username': self.author.username}),
+             'posts_post', 'post_author_pub_date_idx'),
+            (reverse('posts:follow_index'),
+             'posts_post', 'feed_user_pub_date_idx'),
+            (reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+             'posts_comment', 'comment_post_created_idx'),
+        ]
+        for url, table, index in cases:
+            with self.subTest(url=url):
+                plan = self.plan(url, table)
+                self.assertIn(f'USING INDEX {index}', plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_last_modified_uses_index(self):
+        """Max('updated') для ETag читается по индексу, без скана."""
+        cases = [
+            (conditional.index_modified, (), 'post_updated_idx'),
+            (conditional.group_modified, (self.group.slug,),
+             'post_group_updated_idx'),
+            (conditional.profile_modified, (self.author.username,),
+             'post_author_updated_idx'),
+        ]
+        for modified, args, index in cases:
+            with self.subTest(index=index):
+                with CaptureQueriesContext(connection) as queries:
+                    modified(None, *args)
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN '
+                                   + queries.captured_queries[-1]['sql'])
+                    plan = '\n'.join(row[-1] for row in cursor.fetchall())
+                self.assertIn(f'INDEX {index}', plan)
+                self.assertNotIn('SCAN posts_post', plan)
+
+    def test_follow_lookup_uses_unique_index(self):
+        """Проверка подписки идёт по уникальному индексу (user, author)."""
+        sql, params = (
+            Follow.objects.filter(user=self.user, author=self.author)
+            .query.sql_with_params()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = '\n'.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('(user_id=? AND author_id=?)', plan)
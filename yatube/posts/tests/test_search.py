@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post, SearchTerm
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    """Поиск по FTS5: ранжирование, курсоры и обновление индекса."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.once = Post.objects.create(
+            text='Ёжик в тумане', author=cls.author
+        )
+        cls.twice = Post.objects.create(
+            text='Ежик ищет ежика, а ежик молчит', author=cls.author
+        )
+        Post.objects.create(text='Лошадка в тумане', author=cls.author)
+
+    def find(self, query, cursor=None, per_page=None):
+        return search.search(query, cursor, per_page)
+
+    def test_backend(self):
+        self.assertTrue(search.use_fts())
+
+    def test_results_are_ranked(self):
+        """Чаще встречающееся слово поднимает пост выше."""
+        page = self.find('ЕЖИК')
+        self.assertEqual(list(page), [self.twice, self.once])
+        self.assertIsNone(page.next_cursor)
+
+    def test_all_words_are_required(self):
+        self.assertEqual(list(self.find('ежик тумане')), [self.once])
+        self.assertEqual(list(self.find('ежик слон')), [])
+
+    def test_cursor_pages(self):
+        first = self.find('ежик', per_page=1)
+        self.assertEqual(list(first), [self.twice])
+        second = self.find('ежик', first.next_cursor, per_page=1)
+        self.assertEqual(list(second), [self.once])
+        self.assertIsNone(second.next_cursor)
+        self.assertEqual(list(self.find('ежик', 'broken', per_page=1)),
+                         [self.twice])
+
+    def test_index_follows_post_changes(self):
+        post = Post.objects.create(text='Медвежонок', author=self.author)
+        self.assertEqual(list(self.find('медвежонок')), [post])
+
+        post.text = 'Медведь'
+        post.save()
+        self.assertEqual(list(self.find('медвежонок')), [])
+        self.assertEqual(list(self.find('медведь')), [post])
+
+        post.delete()
+        self.assertEqual(list(self.find('медведь')), [])
+
+    def test_rebuild_index(self):
+        search.rebuild_index()
+        self.assertEqual(list(self.find('ежик')), [self.twice, self.once])
+
+    def test_search_view(self):
+        response = Client().get(reverse('posts:search'), {'q': 'туман ёжик'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['query'], 'туман ёжик')
+        response = Client().get(reverse('posts:search'), {'q': 'тумане'})
+        self.assertContains(response, self.once.text)
+        self.assertContains(response, 'Лошадка в тумане')
+
+
+@override_settings(SEARCH_FTS=False)
+class IndexSearchTests(SearchTests):
+    """Те же проверки на запасном индексе SearchTerm."""
+    def test_backend(self):
+        self.assertFalse(search.use_fts())
+        self.assertEqual(
+            SearchTerm.objects.get(post=self.twice, term='ежик').weight, 2
+        )
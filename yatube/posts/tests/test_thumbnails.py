@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+from core.models import Task
+from posts import thumbnails
+from posts.models import Follow, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def png(name):
+    buffer = BytesIO()
+    Image.new('RGB', (40, 20), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailQueueTests(TestCase):
+    """Миниатюры режутся в фоне, страница получает заглушку."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=User.objects.create_user(username='author'),
+            image=png('thumb.png'),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        Task.objects.all().delete()
+
+    def get_index(self):
+        cache.clear()
+        return Client().get(reverse('posts:index')).content.decode()
+
+    def test_request_does_not_resize(self):
+        """Без готовой миниатюры запрос ставит задачу и рисует заглушку."""
+        with mock.patch.object(thumbnails.ThumbnailBackend,
+                               '_create_thumbnail') as create:
+            content = self.get_index()
+
+        create.assert_not_called()
+        self.assertIn('data:image/svg+xml', content)
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'posts.thumbnails.generate_thumbnail')
+        self.assertEqual(json.loads(task.arguments)['args'], [
+            self.post.image.name, '960x339',
+            {'crop': 'center', 'upscale': True},
+        ])
+
+        # Пока задача в очереди, страницы не ставят её повторно.
+        thumbnails.enqueue(self.post.image.name, '960x339', {})
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_worker_replaces_placeholder(self):
+        """Готовая миниатюра сбрасывает кэш страниц и их валидаторы."""
+        follower = User.objects.create_user(username='follower')
+        Follow.objects.create(user=follower, author=self.post.author)
+        client = Client()
+        client.force_login(follower)
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        pages = [reverse('posts:index'), reverse('posts:follow_index')]
+        for url in pages:
+            self.assertIn('data:image/svg+xml',
+                          client.get(url).content.decode())
+        before = client.get(detail)
+
+        self.assertEqual(tasks.run_pending(), 1)
+
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertNotIn('data:image/svg+xml',
+                                 client.get(url).content.decode())
+        response = client.get(detail, HTTP_IF_NONE_MATCH=before['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_generated_thumbnail_replaces_placeholder(self):
+        """После фоновой нарезки страница ссылается на миниатюру."""
+        for geometry, options in thumbnails.POST_THUMBNAILS:
+            thumbnails.generate(self.post.image.name, geometry, options)
+
+        content = self.get_index()
+
+        self.assertNotIn('data:image/svg+xml', content)
+        self.assertIn(settings.MEDIA_URL + 'cache/', content)
+        self.assertFalse(Task.objects.exists())
+
+    def test_ready_thumbnail_is_not_queued_or_announced(self):
+        """Правка поста с готовой миниатюрой не ставит задачу, а повторная
+        нарезка не сбрасывает кэши страниц."""
+        geometry, options = thumbnails.POST_THUMBNAILS[0]
+        thumbnails.generate(self.post.image.name, geometry, options)
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertFalse(Task.objects.exists())
+
+        with mock.patch.object(thumbnails.thumbnail_ready, 'send') as send:
+            thumbnails.generate(post.image.name, geometry, options)
+        send.assert_not_called()
+        self.assertEqual(Post.objects.get(pk=post.pk).updated, post.updated)
+
+    def test_missing_thumbnail_is_cached_briefly(self):
+        """Миниатюру режет другой процесс: «нет миниатюры» не запоминается
+        надолго."""
+        geometry, options = thumbnails.POST_THUMBNAILS[0]
+        backend = thumbnails.QueuedThumbnailBackend()
+        with mock.patch.object(thumbnails.default.kvstore.cache,
+                               'set_many') as set_many:
+            self.assertIsNone(
+                backend.lookup(self.post.image.name, geometry, **options)
+            )
+        set_many.assert_any_call(mock.ANY, thumbnails.MISSING_TIMEOUT)
+        empty, _ = set_many.call_args_list[-1][0]
+        self.assertEqual(len(empty), 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class WarmThumbnailsCommandTests(TestCase):
+    """Команда warm_thumbnails продолжает прерванный прогон."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=author,
+                                image=png(f'warm{i}.png'))
+            for i in range(3)
+        ]
+        cls.checkpoint = os.path.join(TEMP_MEDIA_ROOT, 'checkpoint')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def warm(self, *args):
+        out = StringIO()
+        call_command('warm_thumbnails', '--workers', '1',
+                     '--checkpoint', self.checkpoint, *args, stdout=out)
+        return out.getvalue()
+
+    def ready(self, post):
+        backend = thumbnails.QueuedThumbnailBackend()
+        return all(
+            backend.lookup(post.image.name, geometry, **options)
+            for geometry, options in thumbnails.POST_THUMBNAILS
+        )
+
+    def test_resumes_from_checkpoint_and_skips_ready(self):
+        with open(self.checkpoint, 'w') as file:
+            file.write(str(self.posts[0].pk))
+
+        output = self.warm()
+
+        self.assertFalse(self.ready(self.posts[0]))
+        self.assertTrue(self.ready(self.posts[1]))
+        self.assertTrue(self.ready(self.posts[2]))
+        self.assertIn('нарезано 2', output)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+        output = self.warm('--restart')
+
+        self.assertTrue(self.ready(self.posts[0]))
+        self.assertIn('нарезано 1, пропущено 2', output)
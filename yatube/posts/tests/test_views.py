@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+import time
 from math import ceil
 
 from django import forms
@@ -9,7 +10,9 @@ from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils.http import http_date
 
+from core.testing import QueryAssertionsMixin
 from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
@@ -267,48 +270,45 @@ class PostPagesTests(TestCase):
                          comments_count + 1,
                          msg='Комментариев больше не стало')
 
-        self.assertEqual(response.context['comments'].first().text,
+        self.assertEqual(response.context['comments'][0].text,
                          comment_form['text'],
                          msg='Комментарий не видно')
 
     def test_cache_works(self):
-        # Первая проверка
-        response = self.authorized_client.get(
-            reverse('posts:index'))['cache-control']
+        """Главная кэшируется до первого изменения постов."""
+        page = self.guest_client.get(reverse('posts:index')).content
 
-        # Тут даже время можно проверить
-        self.assertTrue(response == f'max-age={settings.CACHE_TIME}')
+        # Повторный запрос отдаётся из кэша без обращений к базе
+        with self.assertNumQueries(0):
+            page_in_cache = self.guest_client.get(
+                reverse('posts:index')
+            ).content
+        self.assertEqual(page, page_in_cache)
 
-        # Вторая проверка
-        # Создали пост
+        # Новый пост сразу сбрасывает кэш
         new_post = Post.objects.create(
             text='Тестовый текст для кэша',
             author=self.author,
             group=self.group
         )
-        # Сохранили контент страницы с новым постом
-        page = self.authorized_client.get(reverse('posts:index')).content
-        # Удалили новый пост
-        new_post.delete()
-
-        # Сохранили контент страницы с удаленным постом
-        page_in_cache = self.authorized_client.get(
+        page_with_new_post = self.guest_client.get(
             reverse('posts:index')
         ).content
+        self.assertIn(new_post.text.encode(), page_with_new_post)
 
-        # Эти два контента одинаковые
-        self.assertEqual(page, page_in_cache)
-
-        # Очистили кеш
-        cache.clear()
-
-        # Сохранили контент страницы с очищенным кешем
-        page_with_delited_post = self.guest_client.get(
+        # Удаление поста тоже сбрасывает кэш
+        new_post.delete()
+        page_with_deleted_post = self.guest_client.get(
             reverse('posts:index')
         ).content
+        self.assertNotIn(new_post.text.encode(), page_with_deleted_post)
 
-        # Первый контент и контент с очищенным кешем различаются
-        self.assertNotEqual(page_in_cache, page_with_delited_post)
+        # Правка группы сбрасывает кэш
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название группы'
+        group.save()
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('posts:index'))
 
     def test_authorized_can_follow(self):
         """Подписка работает."""
@@ -464,3 +464,207 @@ class PaginatorViewsTest(TestCase):
                     (Post.objects.count() - settings.POSTS_PER_PAGE
                      * (last_page - 1)),
                 )
+
+    def test_cursor_pages_cover_all_records(self):
+        """Курсоры ведут по всем постам вперёд и назад без повторов."""
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        for name in self.pages_names_for_paginator_test:
+            with self.subTest(name=name):
+                seen = []
+                page = self.authorized_client.get(name).context['page_obj']
+                self.assertIsNone(page.previous_cursor)
+                seen.extend(post.pk for post in page)
+                while page.has_next():
+                    page = self.authorized_client.get(
+                        name, {'cursor': page.next_cursor}
+                    ).context['page_obj']
+                    seen.extend(post.pk for post in page)
+                self.assertEqual(seen, expected)
+
+                back = [post.pk for post in page]
+                while page.has_previous():
+                    page = self.authorized_client.get(
+                        name, {'cursor': page.previous_cursor}
+                    ).context['page_obj']
+                    back = [post.pk for post in page] + back
+                self.assertEqual(back, expected)
+
+    def test_broken_cursor_opens_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            self.pages_names_for_paginator_test[1], {'cursor': 'broken'}
+        )
+        self.assertEqual(len(response.context['page_obj']),
+                         settings.POSTS_PER_PAGE)
+
+
+class FeedQueriesTest(QueryAssertionsMixin, TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        for i in range(settings.POSTS_PER_PAGE + 2):
+            author = User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name='Фамилия'
+            )
+            Follow.objects.create(user=cls.user, author=author)
+            Post.objects.create(
+                text='Тестовый текст',
+                group=Group.objects.create(
+                    title=f'Группа {i}', slug=f'group-{i}', description='-'
+                ) if i else cls.group,
+                author=author,
+            )
+        Post.objects.bulk_create(
+            Post(text='Тестовый текст', group=cls.group, author=author)
+            for _ in range(settings.POSTS_PER_PAGE)
+        )
+
+        # group_list и profile сначала считают Last-Modified и поколения
+        # для условного GET: +1 и +2 запроса к полной сборке страницы.
+        cls.expected_queries = {
+            reverse('posts:index'): 3,
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}): 5,
+            reverse('posts:profile', kwargs={'username': author.username}): 7,
+            reverse('posts:follow_index'): 5,
+        }
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_feed_pages_have_fixed_query_count(self):
+        """Автор и группа поста не догружаются отдельными запросами."""
+        for url, queries in self.expected_queries.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.authorized_client.get(url)
+                self.assertEqual(len(response.context['page_obj']),
+                                 settings.POSTS_PER_PAGE)
+
+    def test_feed_pages_have_no_n_plus_one(self):
+        """Запросы не повторяются по постам и не растут со страницей."""
+        for url in self.expected_queries:
+            with self.subTest(url=url):
+                def request():
+                    cache.clear()
+                    self.authorized_client.get(url)
+
+                self.assertNoRepeatedQueries(request)
+                self.assertConstantQueries(request)
+
+
+class ConditionalGetTest(TestCase):
+    """Страницы поста, группы и профиля отвечают 304 без рендера."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Текст', author=cls.author, group=cls.group
+        )
+        cls.urls = [
+            reverse('posts:post_detail', args=[cls.post.pk]),
+            reverse('posts:group_list', args=[cls.group.slug]),
+            reverse('posts:profile', args=[cls.author.username]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assertChanges(self, url, change):
+        etag = self.client.get(url)['ETag']
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertIsNone(response.context)
+
+    def test_no_last_modified(self):
+        """Не все изменения двигают время изменения: страницы проверяются
+        только по ETag, а не по одному If-Modified-Since."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotIn('Last-Modified', self.client.get(url))
+
+        since = http_date(time.time() + 60)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новая группа'
+        group.save()
+        response = self.client.get(self.urls[0],
+                                   HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_deletion_changes_post_detail(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertChanges(self.urls[0], comment.delete)
+
+    def test_edit_and_comment_change_post_detail(self):
+        url = self.urls[0]
+
+        def edit():
+            self.post.text = 'Новый текст'
+            self.post.save()
+
+        self.assertChanges(url, edit)
+        self.assertChanges(url, lambda: Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        ))
+
+    def test_post_detail_depends_on_its_author_and_group(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text='Чужой пост', author=self.reader)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        def rename(instance, **fields):
+            def change():
+                for name, value in fields.items():
+                    setattr(instance, name, value)
+                instance.save()
+            return change
+
+        group = Group.objects.get(pk=self.group.pk)
+        author = User.objects.get(pk=self.author.pk)
+        self.assertChanges(url, rename(group, title='Новая группа'))
+        self.assertChanges(url, rename(author, first_name='Новое имя'))
+        self.assertChanges(url, lambda: Post.objects.create(
+            text='Ещё пост', author=self.author
+        ))
+
+    def test_follow_changes_profile(self):
+        self.assertChanges(self.urls[2], lambda: Follow.objects.create(
+            user=self.reader, author=self.author
+        ))
+
+    def test_viewer_is_part_of_etag(self):
+        etag = self.client.get(self.urls[0])['ETag']
+        response = Client().get(self.urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
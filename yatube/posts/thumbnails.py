@@ -0,0 +1,218 @@
+"""Фоновая нарезка миниатюр для картинок постов.
+
+Запрос никогда не режет картинку сам: ``QueuedThumbnailBackend`` отдаёт
+готовую миниатюру из KV-хранилища sorl, а если её нет — ставит задачу
+``generate_thumbnail`` в очередь ``core.tasks`` и возвращает заглушку того
+же размера.
+"""
+import logging
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.dispatch import Signal
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import (
+    DummyImageFile, ImageFile, deserialize_image_file,
+)
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.tasks import enqueue_many, task
+
+logger = logging.getLogger(__name__)
+
+# Геометрии, которые используют шаблоны постов.
+POST_THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+FAILED_TIMEOUT = 60 * 60
+# Пока задача в очереди, страницы не ставят её повторно.
+QUEUED_TIMEOUT = 60 * 10
+# Сколько помнить, что миниатюры нет. Её нарезает другой процесс, а при
+# locmem его запись в кэш KV-хранилища сюда не дойдёт.
+MISSING_TIMEOUT = 20
+
+# Миниатюра картинки ``name`` нарезана: страницы с её заглушкой устарели.
+thumbnail_ready = Signal(providing_args=['name', 'geometry'])
+
+
+class Placeholder(DummyImageFile):
+    """Серый прямоугольник размера миниатюры, пока она не готова."""
+    @property
+    def url(self):
+        svg = (
+            f"<svg xmlns='http://www.w3.org/2000/svg' "
+            f"width='{self.x}' height='{self.y}'>"
+            f"<rect width='100%' height='100%' fill='#e9ecef'/></svg>"
+        )
+        return 'data:image/svg+xml,' + quote(svg)
+
+
+def _failed_key(name, geometry):
+    return f'thumbnail_failed:{name}:{geometry}'
+
+
+def _queued_key(name, geometry):
+    return f'thumbnail_queued:{name}:{geometry}'
+
+
+def generate(name, geometry, options):
+    """Режет миниатюру, если её ещё нет.
+
+    ``thumbnail_ready`` отправляется, только когда миниатюра появилась:
+    повторная задача для готовой не сбрасывает кэши страниц.
+    """
+    if not default.storage.exists(name):
+        raise FileNotFoundError(name)
+    if QueuedThumbnailBackend().lookup(name, geometry, **options):
+        return
+    ThumbnailBackend().get_thumbnail(name, geometry, **options)
+    thumbnail_ready.send(sender=None, name=name, geometry=geometry)
+
+
+def setup_worker():
+    """Поднимает Django в отдельном процессе нарезки (контекст spawn)."""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+@task()
+def generate_thumbnail(name, geometry, options):
+    try:
+        generate(name, geometry, options)
+    except Exception:
+        logger.warning('Не удалось нарезать %s (%s)', name, geometry,
+                       exc_info=True)
+        cache.set(_failed_key(name, geometry), True, FAILED_TIMEOUT)
+        raise
+    finally:
+        cache.delete(_queued_key(name, geometry))
+
+
+def enqueue(name, geometry, options):
+    """Ставит нарезку в очередь задач, если её там ещё нет."""
+    enqueue_thumbnails([name], geometry, options)
+
+
+def enqueue_thumbnails(names, geometry, options):
+    """То же для нескольких картинок — одним INSERT в очередь."""
+    failed = cache.get_many([_failed_key(name, geometry) for name in names])
+    names = [
+        name for name in names
+        if _failed_key(name, geometry) not in failed
+        and cache.add(_queued_key(name, geometry), True, QUEUED_TIMEOUT)
+    ]
+    if names:
+        enqueue_many(generate_thumbnail,
+                     [(name, geometry, dict(options)) for name in names])
+
+
+def queue_post_thumbnails(name):
+    """Заранее готовит недостающие миниатюры шаблонов для картинки поста."""
+    backend = QueuedThumbnailBackend()
+    for geometry, options in POST_THUMBNAILS:
+        if not backend.lookup(name, geometry, **options):
+            enqueue(name, geometry, options)
+
+
+class QueuedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, который не режет картинки внутри запроса."""
+    def thumbnail_name(self, file_, geometry_string, **options):
+        """Имя файла миниатюры, которое даст sorl."""
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+
+        # Те же опции по умолчанию, что и в ThumbnailBackend, чтобы имя
+        # миниатюры совпало с тем, что создаст фоновая нарезка.
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+
+        return self._get_thumbnail_filename(source, geometry_string, options)
+
+    def lookup(self, file_, geometry_string, **options):
+        """Готовая миниатюра из KV-хранилища или None."""
+        name = self.thumbnail_name(file_, geometry_string, **options)
+        key = add_prefix(ImageFile(name, default.storage).key)
+        value = _kvstore_get_many([key]).get(key)
+        return deserialize_image_file(value) if value else None
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        cached = self.lookup(file_, geometry_string, **options)
+        if cached:
+            return cached
+        enqueue(ImageFile(file_).name, geometry_string, options)
+        return Placeholder(geometry_string)
+
+
+def _kvstore_get_many(keys):
+    """Значения KV-хранилища sorl по ключам: кэш читается одним get_many,
+    промахи — одним запросом к БД вместо запроса на картинку.
+
+    В отличие от sorl, отсутствие миниатюры кэшируется ненадолго
+    (``MISSING_TIMEOUT``), а не на ``THUMBNAIL_CACHE_TIMEOUT``.
+    """
+    kvstore = default.kvstore
+    if not isinstance(kvstore, cached_db_kvstore.KVStore):
+        values = {key: kvstore._get_raw(key) for key in keys}
+        return {key: value for key, value in values.items() if value}
+    found = kvstore.cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(
+            KVStoreModel.objects.filter(key__in=missing)
+            .values_list('key', 'value')
+        )
+        empty = {
+            key: cached_db_kvstore.EMPTY_VALUE
+            for key in missing if key not in stored
+        }
+        kvstore.cache.set_many(stored, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        kvstore.cache.set_many(empty, MISSING_TIMEOUT)
+        found.update(stored)
+        found.update(empty)
+    return {
+        key: value for key, value in found.items()
+        if value != cached_db_kvstore.EMPTY_VALUE
+    }
+
+
+def thumbnails(names, geometry, options):
+    """Миниатюры нескольких картинок: {имя: миниатюра или заглушка}.
+
+    То же, что ``get_thumbnail`` для каждой картинки, но KV-хранилище
+    читается одним обращением; недостающие миниатюры ставятся в очередь.
+    """
+    backend = QueuedThumbnailBackend()
+    keys = {
+        name: add_prefix(ImageFile(
+            backend.thumbnail_name(name, geometry, **options),
+            default.storage
+        ).key)
+        for name in set(names)
+    }
+    values = _kvstore_get_many(list(keys.values()))
+    found = {}
+    for name, key in keys.items():
+        if key in values:
+            found[name] = deserialize_image_file(values[key])
+        else:
+            found[name] = Placeholder(geometry)
+    enqueue_thumbnails(
+        [name for name in found if isinstance(found[name], Placeholder)],
+        geometry, options
+    )
+    return found
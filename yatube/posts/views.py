@@ -1,47 +1,73 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.decorators import cache_view, conditional_view
 from posts.forms import CommentForm, PostForm
+from . import search as post_search
+from .comments import comment_page
+from .conditional import (
+    group_modified, post_generations, post_modified, profile_generations,
+    profile_modified,
+)
+from .feed import feed_generations, follow_feed
 from .models import Follow, Group, Post, User
+from .paginators import CursorPaginator
+from .signals import INDEX_GENERATION
 
 
-def pagination(request, post_list):
+def pagination(request, post_list, cursor=False):
+    """Страница постов.
+
+    Представления с ``cursor=True`` листают по ``?cursor=`` без COUNT(*)
+    и OFFSET; старые ссылки вида ``?page=N`` продолжают работать.
+    """
+    if cursor and 'page' not in request.GET:
+        paginator = CursorPaginator(post_list, settings.POSTS_PER_PAGE)
+        return paginator.get_page(request.GET.get('cursor'))
     paginator = Paginator(post_list, settings.POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(settings.CACHE_TIME, key_prefix='index_page')
+@cache_view(
+    settings.CACHE_TIME, key_prefix='index_page', generation=INDEX_GENERATION
+)
 def index(request):
     context = {
-        'page_obj': pagination(request, Post.objects.all()),
+        'page_obj': pagination(request, Post.objects.for_feed(), cursor=True),
         'image': request.FILES or None
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_view(group_modified, generation=INDEX_GENERATION,
+                  send_last_modified=False)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     context = {
         'group': group,
-        'page_obj': pagination(request, group.posts.all()),
+        'page_obj': pagination(request, group.posts.for_feed(), cursor=True),
         'image': request.FILES or None,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_view(profile_modified, generation=profile_generations,
+                  send_last_modified=False)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     template = 'posts/profile.html'
     if request.user.is_authenticated:
         following = author.following.exists()
     else:
         following = None
     context = {
-        'page_obj': pagination(request, author.posts.all()),
+        'page_obj': pagination(request, author.posts.for_feed(), cursor=True),
         'author': author,
         'image': request.FILES or None,
         'following': following,
@@ -49,20 +75,34 @@ def profile(request, username):
     return render(request, template, context)
 
 
+@conditional_view(post_modified, generation=post_generations,
+                  send_last_modified=False)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     comment_form = CommentForm(request.POST or None)
     context = {
         'post': post,
         'image': request.FILES or None,
         'form': comment_form,
-        'comments': post.comments.all(),
-
+        'comments': comment_page(post, request.GET.get('comments')),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    context = {
+        'query': query,
+        'page_obj': post_search.search(query, request.GET.get('cursor'))
+        if query else None,
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -99,6 +139,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
@@ -110,17 +151,31 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def first_pages(request):
+    """Кэшируются только первые FOLLOW_CACHE_PAGES страниц ленты."""
+    page = request.GET.get('page', '1')
+    return page.isdigit() and int(page) <= settings.FOLLOW_CACHE_PAGES
+
+
 @login_required
+@cache_view(
+    settings.FOLLOW_CACHE_TIME,
+    key_prefix='follow_page',
+    generation=feed_generations,
+    cache_alias='feeds',
+    condition=first_pages,
+)
 def follow_index(request):
-    # информация о текущем пользователе доступна в переменной request.user
-    posts = Post.objects.filter(author__following__user=request.user)
     context = {
-        'page_obj': pagination(request, posts),
+        'page_obj': pagination(
+            request, follow_feed(request.user).for_feed()
+        ),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user == author:
@@ -130,6 +185,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
     Follow.objects.get(user=request.user, author=author).delete()
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -19,17 +20,28 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
+# Режим запуска: development (по умолчанию) или production — без DEBUG,
+# с кэшированным загрузчиком шаблонов и их прогревом при старте воркера.
+ENVIRONMENT = os.environ.get('YATUBE_ENV', 'development')
+PRODUCTION = ENVIRONMENT == 'production'
+# manage.py test или pytest.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '$vu&&zyfn$9s)%-2i82t#d1r^dsoiq4adqt2wv&s!yj)7px7)x'
+SECRET_KEY = os.environ.get(
+    'YATUBE_SECRET_KEY',
+    '$vu&&zyfn$9s)%-2i82t#d1r^dsoiq4adqt2wv&s!yj)7px7)x'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = not PRODUCTION
 
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
     '[::1]',
     'testserver',
+    *filter(None, os.environ.get('YATUBE_ALLOWED_HOSTS', '').split(',')),
 ]
 
 
@@ -49,6 +61,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,12 +76,21 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+# В production скомпилированные шаблоны живут в памяти процесса:
+# wsgi.py компилирует их при старте, запросы не читают файлы.
+if PRODUCTION:
+    TEMPLATE_LOADERS = [('django.template.loaders.cached.Loader',
+                         TEMPLATE_LOADERS)]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -85,13 +108,52 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Профиль базы задаётся окружением. По умолчанию — файл SQLite рядом с
+# проектом; для серверной СУБД достаточно YATUBE_DB_ENGINE и параметров
+# подключения. CONN_MAX_AGE держит соединение между запросами.
+DB_ENGINE = os.environ.get('YATUBE_DB_ENGINE', 'django.db.backends.sqlite3')
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get(
+            'YATUBE_DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')
+        ),
+        'USER': os.environ.get('YATUBE_DB_USER', ''),
+        'PASSWORD': os.environ.get('YATUBE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('YATUBE_DB_HOST', ''),
+        'PORT': os.environ.get('YATUBE_DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('YATUBE_CONN_MAX_AGE', 60)),
     }
 }
 
+# PRAGMA для каждого нового соединения SQLite (core.signals): WAL
+# позволяет читать во время записи, NORMAL в режиме WAL не теряет
+# целостность, busy_timeout (мс) ждёт блокировку вместо ошибки
+# «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('YATUBE_SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('YATUBE_SQLITE_SYNCHRONOUS', 'normal'),
+    'mmap_size': int(os.environ.get('YATUBE_SQLITE_MMAP_SIZE', 256 * 2**20)),
+    'busy_timeout': int(os.environ.get('YATUBE_SQLITE_BUSY_TIMEOUT', 5000)),
+}
+
+# Реплики только читаются, пишет всё в default. Локально реплика — второй
+# файл SQLite, который копирует из основной базы команда sync_replica:
+# YATUBE_REPLICA=db_replica.sqlite3 python manage.py sync_replica
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+if os.environ.get('YATUBE_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, os.environ['YATUBE_REPLICA']),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+# После записи пользователь столько секунд читает из основной базы.
+REPLICA_PIN_SECONDS = 5
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -134,20 +196,149 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Кэш: locmem — свой у каждого процесса (по умолчанию, для разработки и
+# тестов), sqlite — общий файл для всех воркеров одного хоста, иначе путь
+# к бэкенду Django (например, memcached) и его адрес в
+# YATUBE_CACHE_LOCATION.
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE_BACKEND', 'locmem')
+CACHE_DIR = os.environ.get(
+    'YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')
+)
+
+# Поколения кэша (core.cache) хранятся в кэше default. В locmem смену
+# поколения видит только процесс, который её сделал, поэтому без общего
+# кэша страницы под поколениями живут недолго.
+SHARED_CACHE = CACHE_BACKEND != 'locmem'
+
 # SiteSettings
 SYMBOLS_COUNT = 15
 POSTS_PER_PAGE = 10
-CACHE_TIME = 20
+# Главная страница сбрасывается сменой поколения кэша при изменении
+# постов и групп, поэтому с общим кэшем TTL может быть долгим.
+CACHE_TIME = 60 * 60 if SHARED_CACHE else 20
+# Лента подписок: выше этого числа подписчиков посты автора
+# не раскладываются по лентам, а подмешиваются при чтении.
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 500
+FOLLOW_CACHE_TIME = 60 * 10 if SHARED_CACHE else 20
+FOLLOW_CACHE_PAGES = 3
+
+COMMENTS_PER_PAGE = 20
+# Первая страница комментариев кэшируется у постов, где их не меньше
+# порога; кэш сбрасывается новым комментарием.
+COMMENTS_CACHE_THRESHOLD = 20
+COMMENTS_CACHE_TIME = 60 * 60 if SHARED_CACHE else 20
+# Карточки постов в лентах: ключ меняется вместе с содержимым, поэтому
+# устаревшие карточки не читаются и просто вытесняются.
+POST_CARD_CACHE_TIME = 60 * 60 * 24
+
+# Миниатюры режутся задачами очереди, запрос получает заглушку.
+THUMBNAIL_BACKEND = 'posts.thumbnails.QueuedThumbnailBackend'
+
+# Очередь фоновых задач (core.tasks, воркер — manage.py run_tasks).
+# Повтор после n-й ошибки — через TASK_RETRY_DELAY * 2**(n - 1) секунд.
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 30
+# Пауза воркера при пустой очереди.
+TASK_POLL_INTERVAL = 1
+# Задача в статусе running дольше этого считается брошенной упавшим
+# воркером и возвращается в очередь.
+TASK_TIMEOUT = 60 * 10
+# Сколько хранить выполненные задачи для статистики задержек.
+TASK_RETENTION = 60 * 60 * 24
+
+# Поиск идёт по таблице FTS5, если SQLite собран с ней; False включает
+# запасной обратный индекс SearchTerm.
+SEARCH_FTS = True
+
+# Доля запросов с подробными метриками (БД, шаблоны, кэш) в Server-Timing
+# и строке JSON логгера core.metrics; остальные получают только total.
+# В тестах сэмплирование выключено: тесты метрик включают его сами.
+REQUEST_METRICS_SAMPLE_RATE = 0 if TESTING else 0.05
+
+# Строки JSON логгеров core.metrics и core.tasks пишутся уровнем INFO,
+# поэтому им нужен свой обработчик: корневой логгер без настроек
+# выводит только WARNING и выше. Сообщение уже JSON — без префиксов.
+# В тестах строки INFO не выводятся, чтобы не смешиваться с выводом тестов.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json_line': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'json_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json_line',
+        },
+    },
+    'loggers': {
+        name: {
+            'handlers': ['json_console'],
+            'level': os.environ.get(
+                'YATUBE_LOG_LEVEL', 'WARNING' if TESTING else 'INFO'
+            ),
+            'propagate': False,
+        }
+        for name in ('core.metrics', 'core.tasks')
+    },
+}
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма уходят в очередь задач, воркер отправляет их TASK_EMAIL_BACKEND.
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+TASK_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+if CACHE_BACKEND == 'sqlite':
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'default.sqlite3'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 20000,
+                'MAX_SIZE': 256 * 2**20,
+            },
+        },
+        'feeds': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(CACHE_DIR, 'feeds.sqlite3'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 20000,
+                'MAX_SIZE': 128 * 2**20,
+                'CULL_FREQUENCY': 10,
+            },
+        },
+    }
+elif CACHE_BACKEND != 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.environ['YATUBE_CACHE_LOCATION'],
+        },
+        'feeds': {
+            'BACKEND': CACHE_BACKEND,
+            'LOCATION': os.environ['YATUBE_CACHE_LOCATION'],
+            'KEY_PREFIX': 'feeds',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        # Страницы лент подписок: по записи на пользователя и страницу.
+        # LocMemCache вытесняет давно не читанные записи (LRU), так что
+        # MAX_ENTRIES ограничивает занимаемую память.
+        'feeds': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'feeds',
+            'OPTIONS': {
+                'MAX_ENTRIES': 2000,
+                'CULL_FREQUENCY': 10,
+            },
+        },
     }
-}
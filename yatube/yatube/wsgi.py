@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Воркер начинает с уже скомпилированными шаблонами в кэше загрузчика.
+if settings.PRODUCTION:
+    from core.templates import compile_templates
+
+    compile_templates()